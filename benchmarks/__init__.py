@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Greg Conan: gregmconan@gmail.com
+Created: 2026-10-19
+Updated: 2026-10-19
+"""
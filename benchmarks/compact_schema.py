@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Compare the size and scan speed of the weather_report DBTable and its
+compact version, weather_report_compact. Run 'flask compact-weather' first
+so that both hold the same data.
+Greg Conan: gregmconan@gmail.com
+Created: 2026-10-19
+Updated: 2026-10-19
+"""
+# Import standard libraries
+import argparse
+import json
+import os
+import time
+from typing import Any, Callable, Dict
+
+# PyPI imports
+import numpy as np
+import sqlalchemy as sa
+
+# Local custom imports
+from benchmarks.run import DB_URI_VAR, get_commit, make_app
+
+# Queries to time on each weather data DBTable class
+QUERIES: Dict[str, Callable[[type], sa.Select]] = {
+    "full_scan_aggregate": lambda model: sa.select(
+        sa.func.count(), model.aggregate("max_temp", sa.func.avg),
+        model.aggregate("precipitation", sa.func.sum)
+    ),
+    "yearly_stats": lambda model: model.select_yearly_stats(),
+    "station_year_range": lambda model: model.select_all(
+        *model.get_API_columns(), station_id=sa.select(
+            sa.func.min(model.station_id)).scalar_subquery(),
+        min_date="1990-01-01", max_date="1990-12-31"
+    ),
+}
+
+
+def measure(db_uri: str, repeats: int = 10) -> Dict[str, Any]:
+    """
+    :param db_uri: String, SQLAlchemy URI of a database with the same data
+                   in both weather data DBTables
+    :param repeats: Int, number of times to time each query
+    :return: Dict[str, Any] of each DBTable's size and query timings
+    """
+    app = make_app(db_uri)
+    from corteva_challenge.models import (CompactWeatherReport, db,
+                                          WeatherReport)
+    results = {"commit": get_commit(), "repeats": repeats, "tables": dict()}
+    with app.app_context():
+        with db.engine.connect().execution_options(
+                isolation_level="AUTOCOMMIT") as conn:
+            for model in (WeatherReport, CompactWeatherReport):
+                conn.execute(sa.text(f"VACUUM ANALYZE {model.__tablename__}"))
+
+        for model in (WeatherReport, CompactWeatherReport):
+            name = model.__tablename__
+            sizes = db.session.execute(sa.text(
+                "SELECT pg_table_size(:t), pg_indexes_size(:t), "
+                "pg_total_relation_size(:t), "
+                f"(SELECT count(*) FROM {name})"
+            ), {"t": name}).one()
+            table = dict(zip(("table_bytes", "index_bytes", "total_bytes",
+                              "rows"), sizes))
+            table["bytes_per_row"] = (table["total_bytes"] / table["rows"]
+                                      if table["rows"] else None)
+            for query_name, build_query in QUERIES.items():
+                query = build_query(model)
+                times = list()
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    db.session.execute(query).all()
+                    times.append((time.perf_counter() - start) * 1000)
+                table[f"{query_name}_median_ms"] = float(np.median(times))
+            results["tables"][name] = table
+            db.session.commit()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--db-uri", default=os.getenv(DB_URI_VAR),
+                        help=f"SQLAlchemy URI. Default: ${DB_URI_VAR}")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("-o", "--output", default=None,
+                        help="Path to save the JSON results to")
+    args = parser.parse_args()
+    if not args.db_uri:
+        parser.error(f"Specify --db-uri or ${DB_URI_VAR}")
+    results = measure(args.db_uri, args.repeats)
+    as_json = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as outfile:
+            outfile.write(as_json + "\n")
+    print(as_json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Compare two benchmark result JSON files from benchmarks/run.py and exit
+with a nonzero status if the newer one regressed beyond a tolerance.
+Greg Conan: gregmconan@gmail.com
+Created: 2026-10-19
+Updated: 2026-10-19
+"""
+# Import standard libraries
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Tuple
+
+# Metrics to compare, mapped to True if higher values are better
+INGEST_METRICS = {"rows_per_s": True}
+ENDPOINT_METRICS = {"p50_ms": False, "p95_ms": False, "p99_ms": False}
+
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any],
+            tolerance: float = 0.1) -> Tuple[List[str], List[str]]:
+    """
+    :param baseline: Dict[str, Any] of benchmark results to compare against
+    :param candidate: Dict[str, Any] of newer benchmark results
+    :param tolerance: Float, the largest relative change (e.g. 0.1 for 10%)
+                      in the worse direction that is not a regression
+    :return: Tuple of 2 List[str]s, a report line for every compared metric
+             and a report line for every regressed metric
+    """
+    if baseline.get("params") != candidate.get("params"):
+        print("Warning: comparing benchmarks run with different parameters",
+              file=sys.stderr)
+    lines = list()
+    regressions = list()
+    pairs = [("ingest", baseline.get("ingest"), candidate.get("ingest"),
+              INGEST_METRICS)]
+    for name, old in baseline.get("endpoints", dict()).items():
+        new = candidate.get("endpoints", dict()).get(name)
+        pairs.append((name, old, new, ENDPOINT_METRICS))
+
+    for name, old, new, metrics in pairs:
+        if not old or not new:
+            continue
+        for metric, higher_is_better in metrics.items():
+            change = (new[metric] - old[metric]) / old[metric]
+            worse = -change if higher_is_better else change
+            line = (f"{name} {metric}: {old[metric]:.3f} -> "
+                    f"{new[metric]:.3f} ({change:+.1%})")
+            lines.append(line)
+            if worse > tolerance:
+                regressions.append(line)
+    return lines, regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Largest relative slowdown that is not a "
+                             "regression. Default: 0.1 (10%%)")
+    args = parser.parse_args()
+    with open(args.baseline) as infile:
+        baseline = json.load(infile)
+    with open(args.candidate) as infile:
+        candidate = json.load(infile)
+
+    lines, regressions = compare(baseline, candidate, args.tolerance)
+    print("\n".join(lines))
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond "
+              f"{args.tolerance:.0%}:\n" + "\n".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Concurrent HTTP load test: start the app under gunicorn with each given
+worker/thread/DB pool configuration, replay a realistic mix of API requests
+at increasing concurrency, and report throughput, tail latency, error rate,
+and DB connection pool saturation at each level.
+Greg Conan: gregmconan@gmail.com
+Created: 2026-10-19
+Updated: 2026-10-19
+"""
+# Import standard libraries
+import argparse
+import asyncio
+import datetime as dt
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# PyPI imports
+import numpy as np
+import sqlalchemy as sa
+
+# Local custom imports
+from benchmarks.run import (DB_URI_VAR, EndpointBuilder, get_commit,
+                            random_date_range, summarize_latencies,
+                            weather_filtered, weather_stats_filtered)
+from corteva_challenge.utilities import build_endpt_path
+
+# Application name that the app's DB connections identify themselves with
+# during a load test, to count them in pg_stat_activity
+PG_APP_NAME = "corteva-loadtest"
+
+# Top-level directory of this repo, where gunicorn can import app.py
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def weather_by_station(rng: np.random.Generator,
+                       scale: Dict[str, Any]) -> str:
+    return build_endpt_path("api", "weather", page=rng.integers(1, 11),
+                            station_id=rng.choice(scale["station_ids"]),
+                            per_page=rng.choice([20, 50, 100]))
+
+
+def weather_by_dates(rng: np.random.Generator, scale: Dict[str, Any]) -> str:
+    min_date, max_date = random_date_range(rng, scale)
+    return build_endpt_path("api", "weather", min_date=min_date,
+                            max_date=max_date, page=rng.integers(1, 6))
+
+
+# Realistic mix of requests to replay: (relative weight, path builder)
+REQUEST_MIX: List[Tuple[float, EndpointBuilder]] = [
+    (20, lambda rng, scale: build_endpt_path(
+        "api", "weather", page=rng.integers(1, 21), per_page=50
+    )),
+    (25, weather_by_station),
+    (20, weather_filtered),
+    (10, weather_by_dates),
+    (5, lambda rng, scale: "/api/weather/stats"),
+    (10, weather_stats_filtered),
+    (10, lambda rng, scale: build_endpt_path(
+        "api", "crop", page=rng.integers(1, 3), per_page=20
+    )),
+]
+
+
+class HTTPClient:
+    """
+    Minimal asyncio HTTP/1.1 client which sends GET requests over one
+    connection at a time, reusing it unless the server closes it
+    """
+
+    def __init__(self, host: str, port: int) -> None:
+        """
+        :param host: String, the hostname or IP address of the server
+        :param port: Int, the port that the server listens on
+        """
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def get(self, path: str) -> Tuple[int, int]:
+        """
+        :param path: String, the URL path (and query) to GET
+        :return: Tuple[int, int], the response status code and body length
+        """
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port)
+        self.writer.write(f"GET {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                          "Accept-Encoding: identity\r\n\r\n".encode())
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Server closed the connection")
+        status = int(status_line.split()[1])
+        headers = dict()
+        while (line := await self.reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip().lower()
+
+        if "content-length" in headers:
+            body_len = len(await self.reader.readexactly(
+                int(headers["content-length"])))
+        elif headers.get("transfer-encoding") == "chunked":
+            body_len = 0
+            while (size := int((await self.reader.readline()).split(b";")[0],
+                               16)):
+                body_len += len(await self.reader.readexactly(size))
+                await self.reader.readline()
+            await self.reader.readline()
+        else:  # Body ends when the server closes the connection
+            body_len = len(await self.reader.read())
+            headers["connection"] = "close"
+
+        if headers.get("connection") == "close":
+            self.close()
+        return status, body_len
+
+
+class PoolSampler:
+    """
+    Periodically counts the app's PostgreSQL connections in pg_stat_activity
+    """
+    QUERY = sa.text("SELECT count(*), count(*) FILTER (WHERE state = 'active')"
+                    " FROM pg_stat_activity WHERE application_name = :app")
+
+    def __init__(self, db_uri: str, interval: float = 0.25) -> None:
+        """
+        :param db_uri: String, SQLAlchemy URI of the database that the app
+                       under test is attached to
+        :param interval: Float, number of seconds between samples
+        """
+        self.engine = sa.create_engine(db_uri, pool_size=1)
+        self.interval = interval
+        self.samples: List[Tuple[int, int]] = list()
+
+    def sample(self) -> Tuple[int, int]:
+        """
+        :return: Tuple[int, int], the number of the app's open DB connections
+                 and the number of them currently running a query
+        """
+        with self.engine.connect() as conn:
+            return tuple(conn.execute(self.QUERY, {"app": PG_APP_NAME}).one())
+
+    async def run_until(self, deadline: float) -> None:
+        """
+        :param deadline: Float, the asyncio event loop time to stop sampling at
+        """
+        self.samples = list()
+        loop = asyncio.get_running_loop()
+        while loop.time() < deadline:
+            self.samples.append(await asyncio.to_thread(self.sample))
+            await asyncio.sleep(self.interval)
+
+    def summarize(self, max_conns: Optional[int]) -> Dict[str, float]:
+        """
+        :param max_conns: Int, the largest number of DB connections that the
+                          app could open (workers * threads/pool limit)
+        :return: Dict[str, float] of connection pool usage statistics
+        """
+        opened, active = np.array(self.samples or [(0, 0)]).T
+        summary = {"max_open_conns": int(opened.max()),
+                   "mean_active_conns": float(active.mean()),
+                   "max_active_conns": int(active.max())}
+        if max_conns:
+            summary["saturation"] = float(active.mean()) / max_conns
+            summary["peak_saturation"] = int(opened.max()) / max_conns
+        return summary
+
+
+async def run_level(host: str, port: int, concurrency: int, duration: float,
+                    scale: Dict[str, Any], sampler: PoolSampler,
+                    max_conns: Optional[int], seed: int = 0,
+                    timeout: float = 30) -> Dict[str, Any]:
+    """
+    Send requests from concurrency simulated clients, each waiting for its
+    previous response before sending its next request, for duration seconds
+    :param host: String, the hostname or IP address of the app under test
+    :param port: Int, the port that the app under test listens on
+    :param concurrency: Int, number of simulated clients
+    :param duration: Float, number of seconds to send requests for
+    :param scale: Dict[str, Any] describing the dataset in the database
+    :param sampler: PoolSampler to measure DB connection pool usage with
+    :param max_conns: Int, the largest number of DB connections that the
+                      app could open (workers * threads/pool limit)
+    :param seed: Int to seed the random number generator with
+    :param timeout: Float, number of seconds after which a request fails
+    :return: Dict[str, Any] of throughput, latency, and error statistics
+    """
+    loop = asyncio.get_running_loop()
+    weights = np.array([weight for weight, _ in REQUEST_MIX], dtype=float)
+    weights /= weights.sum()
+    latencies = list()
+    errors = {"status": 0, "connection": 0, "timeout": 0}
+    deadline = loop.time() + duration
+
+    async def simulate_client(client_num: int) -> None:
+        rng = np.random.default_rng([seed, concurrency, client_num])
+        client = HTTPClient(host, port)
+        while loop.time() < deadline:
+            build_path = REQUEST_MIX[rng.choice(len(REQUEST_MIX),
+                                                p=weights)][1]
+            start = time.perf_counter()
+            try:
+                status, _ = await asyncio.wait_for(
+                    client.get(build_path(rng, scale)), timeout)
+                latencies.append((time.perf_counter() - start) * 1000)
+                if status != 200:
+                    errors["status"] += 1
+            except asyncio.TimeoutError:
+                errors["timeout"] += 1
+                client.close()
+            except (OSError, ConnectionError, ValueError,
+                    asyncio.IncompleteReadError):
+                errors["connection"] += 1
+                client.close()
+        client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(sampler.run_until(deadline),
+                         *[simulate_client(i) for i in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    n_errors = sum(errors.values())
+    n_requests = len(latencies) + errors["timeout"] + errors["connection"]
+    level = {"concurrency": concurrency, "requests": n_requests,
+             "throughput_rps": (n_requests - n_errors) / elapsed,
+             "error_rate": n_errors / n_requests if n_requests else 0.0,
+             "errors": errors, "pool": sampler.summarize(max_conns)}
+    level.update(summarize_latencies(latencies or [0.0]))
+    return level
+
+
+def find_free_port() -> int:
+    """
+    :return: Int, a local TCP port that nothing is listening on
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_app(db_uri: str, port: int, workers: int, threads: int,
+              pool_size: int, max_overflow: int,
+              startup_timeout: float = 60) -> subprocess.Popen:
+    """
+    :param db_uri: String, SQLAlchemy URI of the database to attach app to
+    :param port: Int, the local port for gunicorn to listen on
+    :param workers: Int, number of gunicorn worker processes
+    :param threads: Int, number of threads per gunicorn worker process
+    :param pool_size: Int, SQLAlchemy connection pool size per process
+    :param max_overflow: Int, SQLAlchemy connection pool overflow limit
+    :param startup_timeout: Float, number of seconds to wait for app to start
+    :return: subprocess.Popen running gunicorn, ready to serve requests
+    """
+    env = dict(os.environ, SQLALCHEMY_DATABASE_URI=db_uri,
+               SQLALCHEMY_POOL_SIZE=str(pool_size),
+               SQLALCHEMY_MAX_OVERFLOW=str(max_overflow),
+               PGAPPNAME=PG_APP_NAME)
+    worker_class = "gthread" if threads > 1 else "sync"
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app:app", "--bind",
+         f"127.0.0.1:{port}", "--workers", str(workers), "--threads",
+         str(threads), "--worker-class", worker_class],
+        cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        try:
+            if asyncio.run(HTTPClient("127.0.0.1", port).get("/"))[0] == 200:
+                return proc
+        except OSError:
+            time.sleep(0.25)
+    proc.terminate()
+    raise TimeoutError(f"gunicorn did not start on port {port}")
+
+
+def get_scale(db_uri: str) -> Dict[str, Any]:
+    """
+    :param db_uri: String, SQLAlchemy URI of the database that the app
+                   under test is attached to
+    :return: Dict[str, Any] describing the dataset in the database
+    """
+    engine = sa.create_engine(db_uri)
+    with engine.connect() as conn:
+        station_ids = conn.execute(sa.text(
+            "SELECT id FROM weather_station ORDER BY id")).scalars().all()
+        first, last = conn.execute(sa.text(
+            "SELECT min(date), max(date) FROM weather_report")).one()
+    engine.dispose()
+    if not station_ids or first is None:
+        raise ValueError("Load data into the database before load testing, "
+                         "e.g. by running benchmarks/run.py")
+    return {"station_ids": station_ids, "start_year": first.year,
+            "years": last.year - first.year + 1}
+
+
+def find_capacity(levels: List[Dict[str, Any]], slo_ms: float,
+                  max_error_rate: float) -> Dict[str, Any]:
+    """
+    :param levels: List[Dict[str, Any]] of run_level results
+    :param slo_ms: Float, the largest acceptable p99 latency in milliseconds
+    :param max_error_rate: Float, the largest acceptable error rate
+    :return: Dict[str, Any], the highest throughput sustained without
+             exceeding slo_ms or max_error_rate, and at which concurrency
+    """
+    ok = [level for level in levels if level["p99_ms"] <= slo_ms
+          and level["error_rate"] <= max_error_rate]
+    best = max(ok, key=lambda level: level["throughput_rps"], default=None)
+    return {"capacity_rps": best["throughput_rps"] if best else 0.0,
+            "at_concurrency": best["concurrency"] if best else None}
+
+
+def run(db_uri: str, workers: List[int], threads: List[int],
+        pool_sizes: List[int], max_overflow: int, concurrency: List[int],
+        duration: float, slo_ms: float, max_error_rate: float,
+        seed: int = 0, base_url: Optional[str] = None) -> Dict[str, Any]:
+    """
+    :param db_uri: String, SQLAlchemy URI of the database with data loaded
+    :param workers: List[int] of gunicorn worker counts to test
+    :param threads: List[int] of gunicorn threads-per-worker counts to test
+    :param pool_sizes: List[int] of SQLAlchemy pool sizes to test
+    :param max_overflow: Int, SQLAlchemy connection pool overflow limit
+    :param concurrency: List[int] of concurrent client counts to ramp through
+    :param duration: Float, number of seconds to test each concurrency level
+    :param slo_ms: Float, the largest acceptable p99 latency in milliseconds
+    :param max_error_rate: Float, the largest acceptable error rate
+    :param seed: Int to seed the random number generator with
+    :param base_url: String, URL of an already-running app to test instead
+                     of starting the app for each configuration
+    :return: Dict[str, Any], the capacity report
+    """
+    scale = get_scale(db_uri)
+    sampler = PoolSampler(db_uri)
+    report = {"commit": get_commit(),
+              "timestamp": dt.datetime.now(tz=dt.timezone.utc).isoformat(),
+              "params": {"duration_s": duration, "slo_p99_ms": slo_ms,
+                         "max_error_rate": max_error_rate, "seed": seed,
+                         "max_overflow": max_overflow},
+              "configs": list()}
+    if base_url:
+        url = urlsplit(base_url)
+        configs = [(None, None, None)]
+    else:
+        configs = itertools.product(workers, threads, pool_sizes)
+
+    for n_workers, n_threads, pool_size in configs:
+        proc = None
+        if n_workers is None:
+            host, port, max_conns = url.hostname, url.port or 80, None
+        else:
+            host, port = "127.0.0.1", find_free_port()
+            proc = start_app(db_uri, port, n_workers, n_threads,
+                             pool_size, max_overflow)
+            max_conns = n_workers * min(n_threads, pool_size + max_overflow)
+        try:
+            levels = [asyncio.run(run_level(host, port, level, duration,
+                                            scale, sampler, max_conns, seed))
+                      for level in concurrency]
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait()
+        config = {"workers": n_workers, "threads": n_threads,
+                  "pool_size": pool_size, "levels": levels}
+        config.update(find_capacity(levels, slo_ms, max_error_rate))
+        report["configs"].append(config)
+        print(format_config(config), file=sys.stderr)
+    sampler.engine.dispose()
+    return report
+
+
+def format_config(config: Dict[str, Any]) -> str:
+    """
+    :param config: Dict[str, Any], 1 configuration's capacity report
+    :return: String, human-readable table of the configuration's results
+    """
+    lines = [f"\nworkers={config['workers']} threads={config['threads']} "
+             f"pool_size={config['pool_size']}: capacity "
+             f"{config['capacity_rps']:.1f} req/s at concurrency "
+             f"{config['at_concurrency']}",
+             f"{'conc':>5} {'req/s':>9} {'p50ms':>8} {'p95ms':>8} "
+             f"{'p99ms':>8} {'errors':>7} {'active':>7} {'sat':>6}"]
+    for level in config["levels"]:
+        pool = level["pool"]
+        lines.append(f"{level['concurrency']:>5} "
+                     f"{level['throughput_rps']:>9.1f} "
+                     f"{level['p50_ms']:>8.1f} {level['p95_ms']:>8.1f} "
+                     f"{level['p99_ms']:>8.1f} {level['error_rate']:>7.1%} "
+                     f"{pool['mean_active_conns']:>7.2f} "
+                     f"{pool.get('saturation', float('nan')):>6.1%}")
+    return "\n".join(lines)
+
+
+def as_int_list(arg: str) -> List[int]:
+    return [int(x) for x in arg.split(",")]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--db-uri", default=os.getenv(DB_URI_VAR),
+                        help="SQLAlchemy URI of a PostgreSQL database with "
+                             f"data already loaded. Default: ${DB_URI_VAR}")
+    parser.add_argument("--base-url", default=None,
+                        help="Load test an already-running app at this URL "
+                             "instead of starting gunicorn")
+    parser.add_argument("--workers", type=as_int_list, default=[1, 2, 4])
+    parser.add_argument("--threads", type=as_int_list, default=[1])
+    parser.add_argument("--pool-sizes", type=as_int_list, default=[5])
+    parser.add_argument("--max-overflow", type=int, default=0)
+    parser.add_argument("--concurrency", type=as_int_list,
+                        default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--duration", type=float, default=10,
+                        help="Seconds to test each concurrency level")
+    parser.add_argument("--slo-ms", type=float, default=250,
+                        help="Largest acceptable p99 latency")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default=None,
+                        help="Path to save the JSON capacity report to")
+    args = parser.parse_args()
+    if not args.db_uri:
+        parser.error(f"Specify --db-uri or ${DB_URI_VAR}")
+
+    report = run(args.db_uri, args.workers, args.threads, args.pool_sizes,
+                 args.max_overflow, args.concurrency, args.duration,
+                 args.slo_ms, args.max_error_rate, args.seed, args.base_url)
+    as_json = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as outfile:
+            outfile.write(as_json + "\n")
+    print(as_json)
+
+
+if __name__ == "__main__":
+    main()
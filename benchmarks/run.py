@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Reproducible benchmark suite: generate synthetic data, time ingesting it
+into a local PostgreSQL database, time every /api/* endpoint, and save the
+results as JSON to compare across commits (see benchmarks/compare.py).
+Greg Conan: gregmconan@gmail.com
+Created: 2026-10-19
+Updated: 2026-10-19
+"""
+# Import standard libraries
+import argparse
+from collections.abc import Callable
+import datetime as dt
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+# PyPI imports
+from flask import Flask
+import numpy as np
+
+# Local custom imports
+from benchmarks.synthetic import generate
+from corteva_challenge.utilities import build_endpt_path
+
+# Name of the environment variable holding the URI of the (disposable!)
+# database to benchmark against
+DB_URI_VAR = "BENCHMARK_DATABASE_URI"
+
+# Latency percentiles to report for each endpoint
+PERCENTILES = (50, 95, 99)
+
+# Function which accepts a random number generator and the benchmark
+# dataset's scale and returns an API endpoint path to GET, or a tuple of an
+# API endpoint path and the JSON body to POST to it
+EndpointBuilder = Callable[[np.random.Generator, Dict[str, Any]],
+                           Union[str, Tuple[str, Any]]]
+
+
+def random_date_range(rng: np.random.Generator,
+                      scale: Dict[str, Any]) -> Tuple[str, str]:
+    """
+    :param rng: numpy.random.Generator to pick the dates with
+    :param scale: Dict[str, Any] with the "start_year" and "years" of data
+    :return: Tuple[str, str], ISO 8601 minimum and maximum date of a range
+             of up to 1 year within the benchmark dataset
+    """
+    first = np.datetime64(f"{scale['start_year']}-01-01")
+    min_date = first + rng.integers(0, 365 * scale["years"])
+    max_date = min_date + rng.integers(0, 365)
+    return str(min_date), str(max_date)
+
+
+def weather_filtered(rng: np.random.Generator, scale: Dict[str, Any]) -> str:
+    min_date, max_date = random_date_range(rng, scale)
+    return build_endpt_path("api", "weather", min_date=min_date,
+                            max_date=max_date, page=rng.integers(1, 4),
+                            station_id=rng.choice(scale["station_ids"]),
+                            per_page=50)
+
+
+def weather_stats_filtered(rng: np.random.Generator,
+                           scale: Dict[str, Any]) -> str:
+    return build_endpt_path(
+        "api", "weather", "stats",
+        station_id=rng.choice(scale["station_ids"]),
+        year=scale["start_year"] + rng.integers(0, scale["years"])
+    )
+
+
+def weather_anomalies(rng: np.random.Generator,
+                      scale: Dict[str, Any]) -> str:
+    min_date, max_date = random_date_range(rng, scale)
+    return build_endpt_path("api", "weather", "anomalies", min_date=min_date,
+                            max_date=max_date,
+                            station_id=rng.choice(scale["station_ids"]))
+
+
+def weather_batch(rng: np.random.Generator, scale: Dict[str, Any]
+                  ) -> Tuple[str, List[Dict[str, Any]]]:
+    selectors = list()
+    for _ in range(10):
+        min_date, max_date = random_date_range(rng, scale)
+        selectors.append({"station_id": int(rng.choice(scale["station_ids"])),
+                          "min_date": min_date, "max_date": max_date})
+    return "/api/weather/batch", selectors
+
+
+# Every /api/* endpoint to benchmark, mapped to a function to build a
+# request path for it; randomized paths exercise filters and pagination
+ENDPOINTS: Dict[str, EndpointBuilder] = {
+    "/api/weather": lambda rng, scale: build_endpt_path(
+        "api", "weather", page=rng.integers(1, 21), per_page=50
+    ),
+    "/api/weather?filtered": weather_filtered,
+    "/api/weather/stats": lambda rng, scale: "/api/weather/stats",
+    "/api/weather/stats?filtered": weather_stats_filtered,
+    "/api/weather/anomalies": weather_anomalies,
+    "/api/weather/batch": weather_batch,
+    "/api/weather/summary": lambda rng, scale: build_endpt_path(
+        "api", "weather", "summary", stats="min,max,avg,stddev,p50,p95",
+        group="station,year,month"
+    ),
+    "/api/weather/summary?filtered": lambda rng, scale: build_endpt_path(
+        "api", "weather", "summary", stats="avg,p95", group="month",
+        station_id=rng.choice(scale["station_ids"])
+    ),
+    "/api/weather/stations": lambda rng, scale: build_endpt_path(
+        "api", "weather", "stations", page=rng.integers(1, 4), per_page=50
+    ),
+    "/api/ingest": lambda rng, scale: build_endpt_path(
+        "api", "ingest", per_page=20
+    ),
+    "/api/crop": lambda rng, scale: build_endpt_path(
+        "api", "crop", page=rng.integers(1, 3), per_page=20
+    ),
+}
+
+
+def get_commit() -> Optional[str]:
+    """
+    :return: String, the hash of the currently checked-out git commit (with
+             a "+dirty" suffix if there are uncommitted changes), or None
+    """
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "HEAD"],
+                                         text=True).strip()
+        if subprocess.check_output(["git", "status", "--porcelain",
+                                    "--untracked-files=no"], text=True):
+            commit += "+dirty"
+        return commit
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def make_app(db_uri: str) -> Flask:
+    """
+    :param db_uri: String, SQLAlchemy URI of the database to benchmark
+    :return: Flask app attached to the database at db_uri
+    """
+    os.environ["SQLALCHEMY_DATABASE_URI"] = db_uri
+    from corteva_challenge import create_Flask_app  # reads config on call
+    return create_Flask_app()
+
+
+def bench_ingest(app: Flask, data_dir: str,
+                 manifest: Dict[str, int]) -> Dict[str, float]:
+    """
+    Time ingesting all synthetic data into freshly (re)created tables
+    :param app: Flask app attached to the database to benchmark
+    :param data_dir: String, valid path to synthetic data to ingest
+    :param manifest: Dict[str, int] describing the synthetic data
+    :return: Dict[str, float] of ingest timing and throughput
+    """
+    from corteva_challenge.ingest import ingest_local
+    from corteva_challenge.models import db
+    with app.app_context():
+        db.drop_all(bind_key=None)
+        db.create_all(bind_key=None)
+        start = time.perf_counter()
+        ingest_local(data_dir)
+        elapsed = time.perf_counter() - start
+    rows = manifest["weather_rows"] + manifest["yield_rows"]
+    return {"seconds": elapsed, "rows": rows, "rows_per_s": rows / elapsed}
+
+
+def bench_endpoints(app: Flask, scale: Dict[str, Any], samples: int,
+                    warmup: int, seed: int,
+                    endpoints: Optional[List[str]] = None
+                    ) -> Dict[str, Dict[str, float]]:
+    """
+    Time repeated requests to every API endpoint through the Flask test
+    client, so the numbers cover routing, querying, and serialization but
+    not the network or WSGI server (see benchmarks/loadtest.py for those)
+    :param app: Flask app attached to the database to benchmark
+    :param scale: Dict[str, Any] describing the dataset in the database
+    :param samples: Int, number of timed requests per endpoint
+    :param warmup: Int, number of untimed requests per endpoint to run first
+    :param seed: Int to seed the random number generator with
+    :param endpoints: List[str] of ENDPOINTS keys to benchmark, or None to
+                      benchmark all of them
+    :return: Dict[str, Dict[str, float]] mapping each endpoint name to its
+             latency statistics in milliseconds
+    """
+    client = app.test_client()
+    results = dict()
+    for name in endpoints or ENDPOINTS:
+        rng = np.random.default_rng(seed)
+        latencies = list()
+        for i in range(warmup + samples):
+            path = ENDPOINTS[name](rng, scale)
+            start = time.perf_counter()
+            if isinstance(path, tuple):
+                path, body = path
+                response = client.post(path, json=body)
+            else:
+                response = client.get(path)
+            response.get_data()
+            elapsed = time.perf_counter() - start
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} returned {response.status_code}")
+            if i >= warmup:
+                latencies.append(elapsed * 1000)
+        results[name] = summarize_latencies(latencies)
+    return results
+
+
+def summarize_latencies(latencies_ms: List[float]) -> Dict[str, float]:
+    """
+    :param latencies_ms: List[float] of request latencies in milliseconds
+    :return: Dict[str, float] of summary statistics of latencies_ms
+    """
+    stats = {f"p{pct}_ms": float(np.percentile(latencies_ms, pct))
+             for pct in PERCENTILES}
+    stats.update(mean_ms=float(np.mean(latencies_ms)),
+                 max_ms=float(np.max(latencies_ms)), n=len(latencies_ms))
+    return stats
+
+
+def run(db_uri: str, n_stations: int, n_years: int, samples: int = 200,
+        warmup: int = 20, seed: int = 0, start_year: int = 1985,
+        data_dir: Optional[str] = None, skip_ingest: bool = False,
+        endpoints: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    :param db_uri: String, SQLAlchemy URI of a disposable PostgreSQL
+                   database; all of its tables are dropped and recreated
+    :param n_stations: Int, number of synthetic weather stations
+    :param n_years: Int, number of years of synthetic daily reports
+    :param samples: Int, number of timed requests per endpoint
+    :param warmup: Int, number of untimed requests per endpoint to run first
+    :param seed: Int to seed the random number generator with
+    :param start_year: Int, the year of the first synthetic report
+    :param data_dir: String, directory to write synthetic data into, or None
+                     to use a temporary directory
+    :param skip_ingest: True to benchmark the data already in the database
+                        instead of regenerating and re-ingesting it
+    :param endpoints: List[str] of ENDPOINTS keys to benchmark, or None to
+                      benchmark all of them
+    :return: Dict[str, Any], all benchmark results and their context
+    """
+    app = make_app(db_uri)
+    results = {"commit": get_commit(),
+               "timestamp": dt.datetime.now(tz=dt.timezone.utc).isoformat(),
+               "python": platform.python_version(),
+               "params": {"stations": n_stations, "years": n_years,
+                          "start_year": start_year, "seed": seed,
+                          "samples": samples, "warmup": warmup}}
+    if not skip_ingest:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            data_dir = data_dir or tmpdir
+            manifest = generate(data_dir, n_stations, n_years,
+                                start_year, seed)
+            results["ingest"] = bench_ingest(app, data_dir, manifest)
+
+    from corteva_challenge.models import WeatherStation
+    with app.app_context():
+        scale = {"start_year": start_year, "years": n_years, "station_ids":
+                 [station.id for station in WeatherStation.query.all()]}
+        results["endpoints"] = bench_endpoints(app, scale, samples, warmup,
+                                               seed, endpoints)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--db-uri", default=os.getenv(DB_URI_VAR),
+                        help="SQLAlchemy URI of a disposable PostgreSQL "
+                             f"database. Default: ${DB_URI_VAR}")
+    parser.add_argument("--stations", type=int, default=10)
+    parser.add_argument("--years", type=int, default=30)
+    parser.add_argument("--start-year", type=int, default=1985)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=None,
+                        help="Keep the synthetic data in this directory")
+    parser.add_argument("--skip-ingest", action="store_true",
+                        help="Benchmark the data already in the database")
+    parser.add_argument("--endpoint", action="append", dest="endpoints",
+                        choices=list(ENDPOINTS),
+                        help="Only benchmark this endpoint (repeatable)")
+    parser.add_argument("-o", "--output", default=None,
+                        help="Path to save the JSON results to")
+    args = parser.parse_args()
+    if not args.db_uri:
+        parser.error(f"Specify --db-uri or ${DB_URI_VAR}. Its tables will "
+                     "be dropped, so do not use a production database.")
+
+    results = run(args.db_uri, args.stations, args.years, args.samples,
+                  args.warmup, args.seed, args.start_year, args.data_dir,
+                  args.skip_ingest, args.endpoints)
+    as_json = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as outfile:
+            outfile.write(as_json + "\n")
+    print(as_json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Deterministic synthetic data in the exact wx_data/yld_data format of the
+data source GitHub repo, at any scale, for reproducible benchmarks.
+Greg Conan: gregmconan@gmail.com
+Created: 2026-10-19
+Updated: 2026-10-19
+"""
+# Import standard libraries
+import argparse
+import os
+from typing import Dict
+
+# PyPI imports
+import numpy as np
+
+# Local custom imports
+from corteva_challenge.ingest import DAILY_WEATHER_SUBDIR, YEARLY_YIELD_SUBDIR
+
+# Value that the data source uses to mark a missing measurement
+MISSING = -9999
+
+# Name of the yearly crop yield data file in the data source repo
+YIELD_FILE_NAME = "US_corn_grain_yield.txt"
+
+# Width that the data source right-aligns each daily weather value to, e.g.
+# "19850101\t  -22\t -128\t   94"
+WX_FIELD_WIDTH = 5
+
+
+def generate(out_dir: str, n_stations: int = 10, n_years: int = 30,
+             start_year: int = 1985, seed: int = 0,
+             missing_rate: float = 0.01) -> Dict[str, int]:
+    """
+    Write synthetic daily weather station files and a yearly crop yield file
+    into out_dir/wx_data and out_dir/yld_data. The same arguments always
+    produce byte-identical files.
+    :param out_dir: String, valid path to the directory to write data into
+    :param n_stations: Int, number of weather station files to write
+    :param n_years: Int, number of years of daily reports in each file
+    :param start_year: Int, the year of the first report in each file
+    :param seed: Int to seed the random number generator with
+    :param missing_rate: Float between 0 and 1, the share of measurements to
+                         mark as missing (-9999)
+    :return: Dict[str, int] describing how much data was written
+    """
+    wx_dir = os.path.join(out_dir, DAILY_WEATHER_SUBDIR)
+    yld_dir = os.path.join(out_dir, YEARLY_YIELD_SUBDIR)
+    os.makedirs(wx_dir, exist_ok=True)
+    os.makedirs(yld_dir, exist_ok=True)
+
+    # Every station reports on every day of the same date range
+    dates = np.arange(np.datetime64(f"{start_year}-01-01"),
+                      np.datetime64(f"{start_year + n_years}-01-01"))
+    date_strs = np.char.replace(np.datetime_as_string(dates, unit="D"),
+                                "-", "")
+    day_of_year = (dates - dates.astype("datetime64[Y]")).astype(int)
+    season = np.sin(2 * np.pi * (day_of_year - 105) / 365.25)
+
+    for i in range(n_stations):
+        # One generator per station, so files don't depend on n_stations
+        rng = np.random.default_rng([seed, i])
+        wx_data = make_station_data(rng, season, missing_rate)
+        with open(os.path.join(wx_dir, f"SYN{i:06d}.txt"), "w") as outfile:
+            outfile.writelines(
+                date + "".join(f"\t{value:>{WX_FIELD_WIDTH}}"
+                               for value in values) + "\n"
+                for date, values in zip(date_strs, wx_data.tolist())
+            )
+
+    rng = np.random.default_rng([seed, n_stations])
+    years = np.arange(start_year, start_year + n_years)
+    bushels = rng.integers(200_000, 400_000, size=n_years)
+    with open(os.path.join(yld_dir, YIELD_FILE_NAME), "w") as outfile:
+        outfile.writelines(f"{year}\t{amount}\n"
+                           for year, amount in zip(years, bushels))
+
+    return {"stations": n_stations, "years": n_years, "seed": seed,
+            "weather_rows": n_stations * dates.size, "yield_rows": n_years}
+
+
+def make_station_data(rng: np.random.Generator, season: np.ndarray,
+                      missing_rate: float) -> np.ndarray:
+    """
+    :param rng: numpy.random.Generator to draw one station's data from
+    :param season: numpy.ndarray of floats between -1 (coldest) and 1
+                   (warmest) for each day to generate a report for
+    :param missing_rate: Float between 0 and 1, the share of measurements to
+                         mark as missing (-9999)
+    :return: numpy.ndarray of ints with 1 row per day and 3 columns, the max
+             and min temperature in tenths of a degree Celsius and the
+             precipitation in tenths of a millimeter
+    """
+    n_days = season.size
+    baseline = rng.uniform(-50, 150)  # Station's yearly mean temp, 0.1 degC
+    max_temp = baseline + 60 + 150 * season + rng.normal(0, 40, n_days)
+    min_temp = max_temp - rng.uniform(30, 150, n_days)
+    precip = np.where(rng.random(n_days) < 0.3,
+                      rng.exponential(60, n_days), 0)
+    data = np.column_stack([max_temp, min_temp, precip]).round().astype(int)
+    data[rng.random(data.shape) < missing_rate] = MISSING
+    return data
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=generate.__doc__)
+    parser.add_argument("out_dir")
+    parser.add_argument("--stations", type=int, default=10)
+    parser.add_argument("--years", type=int, default=30)
+    parser.add_argument("--start-year", type=int, default=1985)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(generate(args.out_dir, args.stations, args.years,
+                   args.start_year, args.seed))
+
+
+if __name__ == "__main__":
+    main()
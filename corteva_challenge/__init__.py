@@ -4,16 +4,29 @@
 """
 Greg Conan: gregmconan@gmail.com
 Created: 2024-07-12
-Updated: 2024-07-14
+Updated: 2026-10-19
 """
+# Import standard libraries
+from collections.abc import Callable
+import functools
+from typing import Dict, Optional
+
 # PyPI imports
+import click
 from flasgger import Swagger
 from flask import Flask
 from flask import jsonify
 
 # Local custom imports
-from corteva_challenge.models import db
-from corteva_challenge.ingest import ingest
+from corteva_challenge.admission import admission
+from corteva_challenge.formats import compress_response, export_parquet
+from corteva_challenge.models import (CompactWeatherReport, db, IngestRun,
+                                      weather_model, WeatherNormal)
+from corteva_challenge.ingest import ingest, ingest_local
+from corteva_challenge.replicas import replicas
+from corteva_challenge.scheduler import run_ingest_once, run_scheduler
+from corteva_challenge.store import weather_store
+from corteva_challenge.utilities import ShowTimeTaken
 from corteva_challenge.views import bp
 
 
@@ -24,6 +37,13 @@ def create_Flask_app() -> Flask:
 
     # Attach Flask app to PostgreSQLAlchemy DB object
     db.init_app(app)
+    weather_store.init_app(app)
+    admission.init_app(app)
+    replicas.init_app(app)
+
+    # Compress responses for clients which accept it, unless a proxy does
+    if app.config["COMPRESS_RESPONSES"]:
+        app.after_request(compress_response)
 
     swagger = Swagger(app)
 
@@ -39,15 +59,69 @@ def create_Flask_app() -> Flask:
         """
         return jsonify(message="API is running.")
 
-    # Create DB Tables
+    # Create DB Tables on the primary DB, not on any read replicas
     @app.cli.command("setup-db")
     def setup_db():
-        db.create_all()
+        db.create_all(bind_key=None)
 
     # Load weather data
     @app.cli.command("load-data")
-    def load_data():
-        ingest(app.config["GITHUB_TOKEN"])
+    @click.option("--data-dir", default=None,
+                  help="Local directory with wx_data and yld_data "
+                       "subdirectories to load instead of the GitHub repo")
+    def load_data(data_dir: Optional[str]):
+        IngestRun.create_table()
+        if run_ingest_once(get_ingest_fn(data_dir)) is None:
+            print("Another instance is already loading data.")
+
+    # Load data every INGEST_INTERVAL_SECONDS, at most 1 instance at a time
+    @app.cli.command("run-scheduler")
+    @click.option("--data-dir", default=None,
+                  help="Local directory with wx_data and yld_data "
+                       "subdirectories to load instead of the GitHub repo")
+    @click.option("--interval", type=float, default=None,
+                  help="Seconds between ingests. Default: "
+                       "$INGEST_INTERVAL_SECONDS or 1 day")
+    def run_ingest_scheduler(data_dir: Optional[str],
+                             interval: Optional[float]):
+        IngestRun.create_table()
+        run_scheduler(app, get_ingest_fn(data_dir),
+                      interval or app.config["INGEST_INTERVAL_SECONDS"])
+
+    def get_ingest_fn(data_dir: Optional[str]
+                      ) -> Callable[[], Dict[str, int]]:
+        return (functools.partial(ingest_local, data_dir) if data_dir else
+                functools.partial(ingest, app.config["GITHUB_TOKEN"]))
+
+    # Copy weather data into the compact schema (see COMPACT_WEATHER_SCHEMA)
+    @app.cli.command("compact-weather")
+    def compact_weather():
+        with ShowTimeTaken("copying weather data into the compact schema"):
+            n_rows = CompactWeatherReport.copy_from_legacy()
+        print(f"Copied {n_rows} new or changed rows into "
+              f"{CompactWeatherReport.__tablename__}. Set "
+              "COMPACT_WEATHER_SCHEMA=1 to use it.")
+
+    # Recalculate every weather station's daily climatology normals
+    @app.cli.command("refresh-normals")
+    def refresh_normals():
+        WeatherNormal.create_table()
+        with ShowTimeTaken("calculating daily weather normals"):
+            n_normals = WeatherNormal.refresh(weather_model())
+            db.session.commit()
+        print(f"Saved {n_normals} daily weather normals.")
+
+    # Save a memory-mapped snapshot of weather data to read without SQL
+    @app.cli.command("snapshot-weather")
+    def snapshot_weather():
+        print(weather_store.build_snapshot() or "Set WEATHER_SNAPSHOT_DIR "
+              "to enable weather data snapshots")
+
+    # Save every table as Parquet, partitioning weather data by year/station
+    @app.cli.command("export-parquet")
+    @click.argument("out_dir")
+    def export_to_parquet(out_dir: str):
+        export_parquet(out_dir)
 
     app.register_blueprint(bp)
 
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Greg Conan: gregmconan@gmail.com
+Created: 2026-10-19
+Updated: 2026-10-19
+"""
+# Import standard libraries
+from collections.abc import Callable, Hashable, Iterator
+from concurrent.futures import Future
+import functools
+import threading
+from typing import Any, Dict, Optional
+
+# PyPI imports
+from flask import abort, Flask, g, has_app_context
+import sqlalchemy as sa
+from sqlalchemy import event, orm
+
+# Local custom imports
+from corteva_challenge.models import db
+
+# PostgreSQL error code of a query cancelled by its statement_timeout
+QUERY_CANCELED = "57014"
+
+
+class AdmissionControl:
+    """
+    Decides which API requests each app process runs now and which it turns
+    away, so that bursts of expensive queries cannot use up the DB
+    connection pool and stall every other endpoint. It coalesces identical
+    in-flight queries into 1, limits how many requests to each expensive
+    endpoint query at once, cancels queries which take too long, and
+    responds 503 Service Unavailable instead of queueing when the pool is
+    full.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = True
+        self.flights: Dict[Hashable, Future] = dict()
+        self.lock = threading.Lock()
+        self.max_concurrent = 2
+        self.max_connections: Optional[int] = None
+        self.retry_after = 1
+        self.slots: Dict[str, threading.BoundedSemaphore] = dict()
+        self.statement_timeout_ms = 10000
+        self.wait_seconds = 2.0
+
+    def init_app(self, app: Flask) -> None:
+        """
+        Read admission limits from the app's config
+        :param app: Flask app whose config to read settings from
+        """
+        self.enabled = app.config.get("ADMISSION_CONTROL", self.enabled)
+        self.max_concurrent = app.config.get("ADMISSION_MAX_CONCURRENT",
+                                             self.max_concurrent)
+        self.retry_after = app.config.get("ADMISSION_RETRY_AFTER_SECONDS",
+                                          self.retry_after)
+        self.statement_timeout_ms = app.config.get(
+            "STATEMENT_TIMEOUT_MS", self.statement_timeout_ms)
+        self.wait_seconds = app.config.get("ADMISSION_WAIT_SECONDS",
+                                           self.wait_seconds)
+        pool = app.config.get("SQLALCHEMY_ENGINE_OPTIONS", dict())
+        self.max_connections = (pool["pool_size"] + pool["max_overflow"]
+                                if "pool_size" in pool else None)
+        self.slots.clear()
+
+    def coalesce(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Single-flight: if another thread is already calling a function with
+        the same key, then wait for its result instead of calling fn again
+        :param key: Hashable uniquely identifying the result of calling fn,
+                    e.g. the query and its parameters
+        :param fn: Function to call if no other thread is calling it; its
+                   result is shared, so it must not be modified
+        :return: Whatever fn returns (or raise whatever it raises)
+        """
+        with self.lock:
+            flight = self.flights.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = self.flights[key] = Future()
+        if not is_leader:
+            return flight.result()
+        try:
+            result = fn()
+            flight.set_result(result)
+            return result
+        except BaseException as err:
+            flight.set_exception(err)
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+
+    def is_saturated(self) -> bool:
+        """
+        :return: True if every connection that the current request's DB
+                 connection pool (its read replica's, if it has one) can
+                 hold is checked out, so another request would have to wait
+                 for one; otherwise False
+        """
+        engine = g.get("read_engine") or db.engine
+        return self.max_connections is not None and \
+            engine.pool.checkedout() >= self.max_connections
+
+    def shed_if_saturated(self) -> None:
+        """
+        Respond 503 Service Unavailable right away if the DB connection
+        pool is full, instead of making the request wait in its queue
+        """
+        if self.enabled and self.is_saturated():
+            abort(503, "Too many requests; try again shortly",
+                  retry_after=self.retry_after)
+
+    def guard(self, statement_timeout_ms: Optional[int] = None) -> Callable:
+        """
+        Decorator for an expensive endpoint's view function, which should
+        run its queries through run()
+        :param statement_timeout_ms: Int, milliseconds after which PostgreSQL
+                                     cancels each of the endpoint's queries;
+                                     STATEMENT_TIMEOUT_MS by default
+        :return: Function to decorate the view function with
+        """
+        def decorator(view: Callable) -> Callable:
+            @functools.wraps(view)
+            def guarded(*args: Any, **kwargs: Any) -> Any:
+                if not self.enabled:
+                    return view(*args, **kwargs)
+                g.statement_timeout_ms = (
+                    self.statement_timeout_ms if statement_timeout_ms
+                    is None else statement_timeout_ms)
+                if db.session().in_transaction():  # Began before the view
+                    set_statement_timeout(db.session, None,
+                                          db.session.connection())
+                try:
+                    return view(*args, **kwargs)
+                except sa.exc.OperationalError as err:
+                    if getattr(err.orig, "pgcode", None) != QUERY_CANCELED:
+                        raise
+                    db.session.rollback()
+                    abort(503, "Query took too long; try again later or "
+                               "request less data",
+                          retry_after=self.retry_after)
+            return guarded
+        return decorator
+
+    def run(self, endpoint: str, fn: Callable[[], Any],
+            key: Optional[Hashable] = None,
+            max_concurrent: Optional[int] = None) -> Any:
+        """
+        Run an expensive endpoint's queries once it has a free slot, or
+        respond 503 if none frees up within ADMISSION_WAIT_SECONDS. Requests
+        with the same key as one already running share its result instead,
+        without waiting for a slot of their own.
+        :param endpoint: String naming the endpoint whose slots to use
+        :param fn: Function which runs the queries and returns their results
+        :param key: Hashable uniquely identifying the results of fn, e.g.
+                    the query and its parameters, or None to not share them
+        :param max_concurrent: Int, most requests to the endpoint that 1 app
+                               process may run at once;
+                               ADMISSION_MAX_CONCURRENT by default
+        :return: Whatever fn returns
+        """
+        def run_in_slot() -> Any:
+            slot = self.get_slot(endpoint, max_concurrent)
+            if not slot.acquire(timeout=self.wait_seconds):
+                abort(503, "Too many requests to this endpoint; try again "
+                           "shortly", retry_after=self.retry_after)
+            try:
+                self.shed_if_saturated()
+                return fn()
+            finally:
+                slot.release()
+
+        if not self.enabled:
+            return fn()
+        return run_in_slot() if key is None else \
+            self.coalesce((endpoint, key), run_in_slot)
+
+    def stream(self, endpoint: str, chunks: Iterator[bytes],
+               max_concurrent: Optional[int] = None) -> Iterator[bytes]:
+        """
+        Like run(), but for a response body streamed from a query. The
+        query starts (and any error it raises, like a cancellation by
+        guard()'s statement timeout, is raised) before this returns, i.e.
+        before the response starts, so that the endpoint can still respond
+        503 instead of a truncated 200. The endpoint's slot stays taken
+        until the stream ends or is closed.
+        :param endpoint: String naming the endpoint whose slots to use
+        :param chunks: Iterator[bytes] of the response body, which runs
+                       its query when the first chunk is requested
+        :param max_concurrent: Int, most requests to the endpoint that 1 app
+                               process may run at once;
+                               ADMISSION_MAX_CONCURRENT by default
+        :return: Iterator[bytes] of the same chunks
+        """
+        def stream_in_slot() -> Iterator[bytes]:
+            slot = self.get_slot(endpoint, max_concurrent)
+            if not slot.acquire(timeout=self.wait_seconds):
+                abort(503, "Too many requests to this endpoint; try again "
+                           "shortly", retry_after=self.retry_after)
+            try:
+                self.shed_if_saturated()
+                first_chunk = next(chunks, b"")
+                yield b""  # Started; the rest of the stream can now be sent
+                yield first_chunk
+                yield from chunks
+            finally:
+                slot.release()
+                if hasattr(chunks, "close"):
+                    chunks.close()
+
+        if not self.enabled:
+            return chunks
+        streamed = stream_in_slot()
+        next(streamed)
+        return streamed
+
+    def get_slot(self, endpoint: str, max_concurrent: Optional[int] = None
+                 ) -> threading.BoundedSemaphore:
+        """
+        :param endpoint: String naming the endpoint's view function
+        :param max_concurrent: Int, most requests to run at once, or None
+                               for ADMISSION_MAX_CONCURRENT
+        :return: threading.BoundedSemaphore limiting requests to endpoint
+        """
+        with self.lock:
+            if endpoint not in self.slots:
+                self.slots[endpoint] = threading.BoundedSemaphore(
+                    max_concurrent or self.max_concurrent)
+            return self.slots[endpoint]
+
+
+@event.listens_for(orm.Session, "after_begin")
+def set_statement_timeout(session: orm.Session, transaction: Any,
+                          connection: sa.Connection) -> None:
+    """
+    Apply the current request's statement timeout, if it has one, to the
+    DB transaction that it just began. Setting it only for the transaction
+    returns the connection to the pool without it.
+    """
+    if has_app_context() and g.get("statement_timeout_ms"):
+        connection.execute(sa.text(
+            "SELECT set_config('statement_timeout', :timeout, true)"
+        ), {"timeout": str(g.statement_timeout_ms)})
+
+
+admission = AdmissionControl()
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Greg Conan: gregmconan@gmail.com
+Created: 2026-10-19
+Updated: 2026-10-19
+"""
+# Import standard libraries
+from collections.abc import Iterable, Iterator
+import io
+import os
+from typing import Any, Dict, List
+import zlib
+
+# PyPI imports
+from flask import (abort, current_app, jsonify, request, Request, Response,
+                   stream_with_context)
+import msgpack
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import sqlalchemy as sa
+
+# Local custom imports
+from corteva_challenge.admission import admission
+from corteva_challenge.models import (CropYield, db, weather_model,
+                                      WeatherStation)
+
+# Content types that the API can respond with
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+PARQUET = "application/vnd.apache.parquet"
+
+# Values of the format= URL parameter mapped to the content type to return
+FORMAT_PARAMS = {"json": JSON, "msgpack": MSGPACK, "arrow": ARROW_STREAM,
+                 "parquet": PARQUET}
+
+# Content types which respond() serializes from Python objects, and the
+# content types which tabular_response() streams from DB query results
+OBJECT_TYPES = (JSON, MSGPACK)
+TABULAR_TYPES = (ARROW_STREAM, PARQUET)
+
+# Values of the layout= URL parameter: "rows" returns a list of objects
+# (1 per row), and "columns" returns 1 object mapping each column name to a
+# list of its values in every row, so each name is only sent once
+LAYOUTS = ("rows", "columns")
+
+# Content-Encodings that the API can compress responses with, in order of
+# preference, and the content types worth compressing (Parquet already is)
+ENCODINGS = ("zstd", "gzip")
+COMPRESSIBLE_TYPES = (JSON, MSGPACK, ARROW_STREAM)
+
+# Fewest bytes in a response body to compress; smaller bodies barely shrink
+MIN_COMPRESS_SIZE = 1024
+
+# Number of DB rows to fetch from the cursor into each Arrow record batch
+BATCH_SIZE = 65536
+
+# Arrow schemas of the tabular data that the API can return; weather data
+# DBTables without an "id" column omit it
+WEATHER_REPORT_SCHEMA = pa.schema([
+    ("station_id", pa.int32()), ("date", pa.date32()),
+    ("max_temp", pa.float64()), ("min_temp", pa.float64()),
+    ("precipitation", pa.int64()), ("id", pa.int64()),
+])
+YEARLY_STATS_SCHEMA = pa.schema([
+    ("station_id", pa.int32()), ("year", pa.int32()),
+    ("avg_min_temp_degC", pa.float64()), ("avg_max_temp_degC", pa.float64()),
+    ("total_precip_cm", pa.int64()),
+])
+
+ANOMALY_SCHEMA = pa.schema([
+    ("date", pa.date32()), ("station_id", pa.int32()),
+    *[(f"{field}{suffix}", pa.float64()) for field in ("max_temp", "min_temp")
+      for suffix in ("", "_normal", "_anomaly", "_zscore")],
+    ("precipitation", pa.int64()), ("precipitation_normal", pa.float64()),
+    ("precipitation_anomaly", pa.float64()),
+])
+
+
+def get_weather_schema(model: type) -> pa.Schema:
+    """
+    :param model: WeatherData DBTable class
+    :return: pa.Schema of the API_FIELDS that model has
+    """
+    return pa.schema([field for field in WEATHER_REPORT_SCHEMA
+                      if field.name in model.API_FIELDS])
+
+
+def select_weather(model: type, **filters: Any) -> sa.Select:
+    """
+    :param model: WeatherData DBTable class
+    :param filters: Mapping[str, Any] of WeatherData.select_all parameters
+    :return: sa.Select of the filtered weather reports with columns in the
+             same order as get_weather_schema(model)
+    """
+    return model.select_all(*model.get_API_columns(
+        get_weather_schema(model).names), **filters)
+
+
+def negotiate(request: Request, offered: Iterable[str] = (*OBJECT_TYPES,
+                                                          *TABULAR_TYPES)
+              ) -> str:
+    """
+    Choose which content type to respond with, from the format= URL
+    parameter if there is one, or else from the Accept header
+    :param request: flask.Request to respond to
+    :param offered: Iterable[str] of content types that the endpoint offers,
+                    in order of preference
+    :return: String, the content type to respond with
+    """
+    format_param = request.args.get("format")
+    if format_param is not None:
+        content_type = FORMAT_PARAMS.get(format_param.lower())
+        if content_type not in offered:
+            abort(400, "format must be one of " + ", ".join(
+                name for name, each_type in FORMAT_PARAMS.items()
+                if each_type in offered))
+        return content_type
+    return request.accept_mimetypes.best_match(offered, default=offered[0])
+
+
+def get_layout(request: Request) -> str:
+    """
+    :param request: flask.Request to respond to
+    :return: String, the layout= URL parameter: "rows" (default) or "columns"
+    """
+    layout = request.args.get("layout", default="rows").lower()
+    if layout not in LAYOUTS:
+        abort(400, f"layout must be one of {', '.join(LAYOUTS)}")
+    return layout
+
+
+def to_columns(rows: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """
+    :param rows: List[Dict[str, Any]] of rows which all have the same keys
+    :return: Dict[str, List[Any]] mapping each key to its value in each row
+    """
+    return {key: [row[key] for row in rows] for key in rows[0]} if rows \
+        else dict()
+
+
+def respond(data: Any, content_type: str = JSON,
+            layout: str = "rows") -> Response:
+    """
+    :param data: JSON-serializable object to return; either a list of rows,
+                 or a dict mapping "items" to a list of rows
+    :param content_type: String, JSON or MSGPACK
+    :param layout: String, "columns" to turn each list of rows into a dict
+                   of columns, or "rows" to leave it as a list
+    :return: flask.Response with data serialized as content_type
+    """
+    if layout == "columns":
+        if isinstance(data, dict):
+            data = {**data, "items": to_columns(data["items"])}
+        else:
+            data = to_columns(data)
+    if content_type == MSGPACK:  # Convert dates etc. the same way as JSON
+        response = Response(msgpack.packb(
+            data, default=current_app.json.default), content_type=MSGPACK)
+    else:
+        response = jsonify(data)
+    response.vary.add("Accept")
+    return response
+
+
+def iter_record_batches(query: sa.Select, schema: pa.Schema,
+                        batch_size: int = BATCH_SIZE
+                        ) -> Iterator[pa.RecordBatch]:
+    """
+    Run a query with a server-side cursor and convert each batch of rows
+    that it fetches straight into Arrow columns, without building dicts
+    :param query: sa.Select whose columns are in the same order as schema
+    :param schema: pa.Schema of the query's result columns
+    :param batch_size: Int, number of rows to fetch into each record batch
+    :return: Iterator[pa.RecordBatch] of all query results
+    """
+    result = db.session.execute(query.execution_options(yield_per=batch_size))
+    for rows in result.partitions():
+        yield pa.RecordBatch.from_arrays([
+            pa.array(values, type=field.type)
+            for values, field in zip(zip(*rows), schema)
+        ], schema=schema)
+
+
+class ChunkSink(io.RawIOBase):
+    """
+    Writable file-like object which holds everything written to it until
+    the next call to take(), so that a writer's output can be streamed
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.chunks: List[bytes] = list()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        """
+        :return: Bytes, everything written since the last call to take()
+        """
+        taken = b"".join(self.chunks)
+        self.chunks.clear()
+        return taken
+
+
+def iter_arrow_stream(batches: Iterable[pa.RecordBatch],
+                      schema: pa.Schema) -> Iterator[bytes]:
+    """
+    :param batches: Iterable[pa.RecordBatch] to serialize
+    :param schema: pa.Schema of every record batch
+    :return: Iterator[bytes] of Arrow IPC stream format data, 1 chunk per
+             record batch
+    """
+    sink = ChunkSink()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            yield sink.take()
+    yield sink.take()
+
+
+def iter_parquet(batches: Iterable[pa.RecordBatch],
+                 schema: pa.Schema) -> Iterator[bytes]:
+    """
+    :param batches: Iterable[pa.RecordBatch] to serialize
+    :param schema: pa.Schema of every record batch
+    :return: Iterator[bytes] of a Parquet file, 1 chunk per row group
+    """
+    sink = ChunkSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            yield sink.take()
+    yield sink.take()
+
+
+def tabular_response(query: sa.Select, schema: pa.Schema, content_type: str,
+                     filename: str, endpoint: str) -> Response:
+    """
+    :param query: sa.Select whose columns are in the same order as schema
+    :param schema: pa.Schema of the query's result columns
+    :param content_type: String, ARROW_STREAM or PARQUET
+    :param filename: String naming the file to download, without extension
+    :param endpoint: String naming the endpoint whose admission control
+                     slots to stream the query results in
+    :return: flask.Response streaming all query results in content_type
+    """
+    serialize = iter_parquet if content_type == PARQUET else iter_arrow_stream
+    extension = "parquet" if content_type == PARQUET else "arrows"
+    response = Response(stream_with_context(admission.stream(
+        endpoint, serialize(iter_record_batches(query, schema), schema)
+    )), content_type=content_type)
+    response.headers["Content-Disposition"] = (
+        f"attachment; filename={filename}.{extension}")
+    response.vary.add("Accept")
+    return response
+
+
+def iter_compressed(chunks: Iterable[bytes],
+                    encoding: str) -> Iterator[bytes]:
+    """
+    Compress each chunk as soon as it arrives and flush it, so that a client
+    can decompress everything received so far without waiting for the rest
+    :param chunks: Iterable[bytes] to compress into 1 stream
+    :param encoding: String, "gzip" or "zstd"
+    :return: Iterator[bytes] of the compressed stream, 1 chunk per chunk
+    """
+    try:
+        if encoding == "gzip":
+            compressor = zlib.compressobj(wbits=31)  # 31 means gzip format
+            for chunk in chunks:
+                yield (compressor.compress(chunk)
+                       + compressor.flush(zlib.Z_SYNC_FLUSH))
+            yield compressor.flush()
+        else:
+            sink = ChunkSink()
+            with pa.CompressedOutputStream(pa.PythonFile(sink, mode="w"),
+                                           encoding) as stream:
+                for chunk in chunks:
+                    stream.write(chunk)
+                    stream.flush()
+                    yield sink.take()
+            yield sink.take()
+    finally:  # Let a streamed response's generator clean up if interrupted
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+def compress_response(response: Response) -> Response:
+    """
+    Compress a response body with the best Content-Encoding that the
+    request's Accept-Encoding header accepts, if any. Streamed responses
+    stay streamed: each chunk is compressed as soon as it is generated.
+    :param response: flask.Response to a request for an API endpoint
+    :return: flask.Response, compressed if the client and content type allow
+    """
+    if (response.status_code != 200 or response.direct_passthrough
+            or response.mimetype not in COMPRESSIBLE_TYPES
+            or "Content-Encoding" in response.headers):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = request.accept_encodings.best_match(ENCODINGS)
+    if encoding is None:
+        return response
+    if response.is_streamed:
+        response.response = iter_compressed(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+    elif (response.content_length or 0) >= MIN_COMPRESS_SIZE:
+        response.set_data(b"".join(iter_compressed(
+            [response.get_data()], encoding)))
+    else:
+        return response
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def export_parquet(out_dir: str, batch_size: int = BATCH_SIZE) -> None:
+    """
+    Save every DBTable as Parquet: weather data as a dataset partitioned
+    into Hive-style year=YYYY/station_id=N subdirectories, and the smaller
+    tables as single files
+    :param out_dir: String, valid path to the directory to save data into
+    :param batch_size: Int, number of rows to fetch into each record batch
+    """
+    # Rows arrive sorted by station and date, so each year=YYYY/station_id=N
+    # partition's rows are contiguous and only 1 file is open at a time
+    model = weather_model()
+    schema = get_weather_schema(model)
+    year = sa.cast(sa.extract("year", model.date), sa.Integer).label("year")
+    query = select_weather(model).add_columns(year)
+    batches = iter_record_batches(query, schema.append(
+        pa.field("year", pa.int32())), batch_size)
+    file_schema = schema.remove(schema.get_field_index("station_id"))
+    partition = writer = None
+    try:
+        for batch in batches:
+            keys = np.column_stack([batch["year"].to_numpy(),
+                                    batch["station_id"].to_numpy()])
+            starts = np.flatnonzero(np.any(np.diff(keys, axis=0), axis=1)) + 1
+            for start, stop in zip([0, *starts], [*starts, len(keys)]):
+                if partition != tuple(keys[start]):
+                    if writer is not None:
+                        writer.close()
+                    partition = tuple(keys[start])
+                    part_dir = os.path.join(
+                        out_dir, model.__tablename__,
+                        f"year={partition[0]}", f"station_id={partition[1]}")
+                    os.makedirs(part_dir, exist_ok=True)
+                    writer = pq.ParquetWriter(os.path.join(
+                        part_dir, "part-0.parquet"), file_schema)
+                writer.write_batch(pa.RecordBatch.from_arrays([
+                    batch[field.name][start:stop] for field in file_schema
+                ], schema=file_schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+    for table in (WeatherStation, CropYield):
+        schema = schema_of(table)
+        pq.write_table(pa.Table.from_batches(list(iter_record_batches(
+            db.select(*table.__table__.columns), schema, batch_size
+        )), schema=schema), os.path.join(
+            out_dir, f"{table.__tablename__}.parquet"))
+
+
+def schema_of(table: type) -> pa.Schema:
+    """
+    :param table: DBTable class with only int, string, and datetime columns
+    :return: pa.Schema of every column in the table, in order
+    """
+    types: Dict[Any, pa.DataType] = {sa.Integer: pa.int64(),
+                                     sa.String: pa.string(),
+                                     sa.DateTime: pa.timestamp("us")}
+    return pa.schema([(col.name, next(pa_type for sa_type, pa_type
+                                      in types.items()
+                                      if isinstance(col.type, sa_type)))
+                      for col in table.__table__.columns])
@@ -4,54 +4,106 @@
 """
 Greg Conan: gregmconan@gmail.com
 Created: 2024-07-13
-Updated: 2024-07-16
+Updated: 2026-10-19
 """
 # Import standard libraries
-from typing import Callable, Optional
+from collections import Counter
+from typing import Callable, Dict, Optional, Union
 
 # Local custom imports
 from corteva_challenge.config import (DATA_SRC_GITHUB_REPO_NAME,
                                       DATA_SRC_GITHUB_REPO_OWNER)
-from corteva_challenge.models import CropYield, GitHubRepoAPI, WeatherStation
-from corteva_challenge.utilities import ShowTimeTaken
+from corteva_challenge.models import (CropYield, GitHubRepoAPI, LocalDataDir,
+                                      WeatherNormal, WeatherStation)
+from corteva_challenge.store import weather_store
+from corteva_challenge.utilities import log, ShowTimeTaken
 
+# Subdirectories of the data source containing each kind of data file
+DAILY_WEATHER_SUBDIR = "wx_data"
+YEARLY_YIELD_SUBDIR = "yld_data"
 
-def ingest(gh_token: str, max_files: Optional[int] = None) -> None:
+
+def ingest(gh_token: str, max_files: Optional[int] = None
+           ) -> Dict[str, int]:
     """
     :param gh_token: String, entire valid GitHub authentication token to
                      access the GitHub API using REST requests
     :param max_files: Int, upper limit on the number of files to load at once
+    :return: Dict[str, int] of IngestRun row count column names to the
+             number of rows changed in each DBTable
     """
     # Access GitHub repository containing data files to ingest
-    DAILY_WEATHER_SUBDIR = "wx_data"
-    YEARLY_YIELD_SUBDIR = "yld_data"
     repo = GitHubRepoAPI(auth_token=gh_token,
                          name=DATA_SRC_GITHUB_REPO_NAME,
                          owner=DATA_SRC_GITHUB_REPO_OWNER,
                          data_subdirs=[DAILY_WEATHER_SUBDIR,
                                        YEARLY_YIELD_SUBDIR])
+    return ingest_from(repo, max_files)
+
+
+def ingest_local(data_dir: str, max_files: Optional[int] = None
+                 ) -> Dict[str, int]:
+    """
+    :param data_dir: String, valid path to a local directory laid out like
+                     the data source GitHub repo, with wx_data and yld_data
+                     subdirectories (e.g. benchmarks' synthetic data)
+    :param max_files: Int, upper limit on the number of files to load at once
+    :return: Dict[str, int] of IngestRun row count column names to the
+             number of rows changed in each DBTable
+    """
+    return ingest_from(LocalDataDir(data_dir, [DAILY_WEATHER_SUBDIR,
+                                        YEARLY_YIELD_SUBDIR]), max_files)
+
+
+def ingest_from(repo: Union[GitHubRepoAPI, LocalDataDir],
+                max_files: Optional[int] = None) -> Dict[str, int]:
+    """
+    :param repo: GitHubRepoAPI or LocalDataDir to read data files from
+    :param max_files: Int, upper limit on the number of files to load at once
+    :return: Dict[str, int] of IngestRun row count column names to the
+             number of rows changed in each DBTable
+    """
+    # Download and ingest the data files, recalculating the daily normals of
+    # every weather station whose reports changed
+    WeatherNormal.create_table()
+    weather_counts = get_files_from(repo, WeatherStation.load_reports_from,
+                                    DAILY_WEATHER_SUBDIR, max_files)
+    yield_counts = get_files_from(repo, CropYield.load_yields_from,
+                                  YEARLY_YIELD_SUBDIR, max_files)
+    row_counts = dict(
+        weather_rows=weather_counts["inserted"] + weather_counts["updated"],
+        yield_rows=yield_counts["inserted"] + yield_counts["updated"],
+        unchanged_rows=weather_counts["unchanged"] + yield_counts["unchanged"]
+    )
 
-    # Download and ingest the data files
-    get_files_from(repo, WeatherStation.load_reports_from,
-                   DAILY_WEATHER_SUBDIR, max_files)
-    get_files_from(repo, CropYield.load_yields_from,
-                   YEARLY_YIELD_SUBDIR, max_files)
+    # Snapshot the new weather data for app processes to read (if enabled)
+    with ShowTimeTaken("saving a snapshot of weather data"):
+        weather_store.build_snapshot()
+    return row_counts
 
 
-def get_files_from(repo: GitHubRepoAPI, load_method: Callable, subdir: str,
-                   max_files: Optional[int] = None) -> None:
+def get_files_from(repo: Union[GitHubRepoAPI, LocalDataDir],
+                   load_method: Callable, subdir: str,
+                   max_files: Optional[int] = None) -> Dict[str, int]:
     """
-    :param repo: GitHubRepoAPI to download data text files from
+    :param repo: GitHubRepoAPI or LocalDataDir to read data text files from
     :param load_method: DBTable ETL classmethod which downloads a data file,
-                        extracts the data, transforms it, and adds it to the
-                        relevant PostgreSQL database
+                        extracts the data, transforms it, adds it to the
+                        relevant PostgreSQL database, and counts its rows
     :param subdir: String, relative path to the GitHub repo subdirectory of
                    data files to download 
     :param max_files: Int, upper limit on the number of files to load at once
+    :return: Dict[str, int] counting how many rows in all files were
+             "inserted", "updated", or skipped as "unchanged"
     """
     files = repo.files_in[subdir]
     if max_files is not None:
         files = files[:max_files]
+    total_counts = Counter(inserted=0, updated=0, unchanged=0)
     with ShowTimeTaken(f"processing {len(files)} files from {subdir}"):
         for eachfile in files:  # TODO Parallelize without breaking AWS deploy
-            load_method(eachfile)
+            file_counts = load_method(eachfile)
+            log(f"{eachfile.name}: " + ", ".join(
+                f"{n} {what}" for what, n in file_counts.items()))
+            total_counts.update(file_counts)
+    return dict(total_counts)
@@ -4,63 +4,115 @@
 """
 Greg Conan: gregmconan@gmail.com
 Created: 2024-07-12
-Updated: 2024-07-16
+Updated: 2026-10-19
 """
 # Import standard libraries
 from collections.abc import Callable
 import csv
 import datetime as dt
 import os
-from typing import Any, Dict, List, Mapping, Optional
+import re
+import socket
+import time
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
 
 # PyPI imports
-from flask import jsonify
+from flask import current_app
 from flask_sqlalchemy.pagination import Pagination
 from flask_sqlalchemy import SQLAlchemy
+import sqlalchemy as sa
 from sqlalchemy import and_, ColumnExpressionArgument, orm
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.dialects.postgresql import ARRAY, Insert, insert
 
 # Local custom imports
+from corteva_challenge.replicas import RoutingSession
 from corteva_challenge.utilities import (as_HTTPS_URL, as_unit_or_null,
-                                         download_GET, utcnow)
+                                         download_GET, read_text_file,
+                                         RowCountCache, utcnow)
 
 
-# Define basic SQLAlchemy database object to modify
-db = SQLAlchemy()
+# Define basic SQLAlchemy database object to modify, whose sessions can read
+# from read replicas
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
+# Whether each row RETURNed by an upsert was inserted instead of updated: an
+# updated row's new version has the ID of the transaction which locked it
+WAS_INSERTED = sa.literal_column("xmax = 0").label("inserted")
 
-class DBTable:
+# /api/weather/summary results kept in memory, at most this many rows in total
+summary_cache = RowCountCache(max_rows=200000)
+
+
+def upsert_changed(values: Insert, index_elements: List[str],
+                   update_cols: List[str]) -> Insert:
     """
-    PostgreSQL database Table with at least 2 columns, unique int ID and 
-    date-timestamp of the moment of each row's creation in the database.
+    :param values: Insert statement adding rows to a PostgreSQL DBTable
+    :param index_elements: List[str] naming the columns of a unique index
+    :param update_cols: List[str] naming the other columns to insert
+    :return: Insert statement which instead updates each existing row with
+             the same index_elements values, but only if any of its
+             update_cols values differ, so that PostgreSQL writes no new
+             row versions (or WAL, or index entries) for unchanged rows
+    """
+    return values.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={col: values.excluded[col] for col in update_cols},
+        where=sa.or_(*[values.table.c[col].is_distinct_from(
+            values.excluded[col]) for col in update_cols])
+    )
+
+
+def run_upsert(values: Insert, index_elements: List[str],
+               update_cols: List[str], n_rows: int) -> Dict[str, int]:
+    """
+    Run upsert_changed without committing
+    :param values: Insert statement adding n_rows rows to a PostgreSQL DBTable
+    :param index_elements: List[str] naming the columns of a unique index
+    :param update_cols: List[str] naming the other columns to insert
+    :param n_rows: Int, the number of rows that values inserts
+    :return: Dict[str, int] counting how many rows were "inserted",
+             "updated", or skipped as "unchanged"
+    """
+    inserted = db.session.execute(upsert_changed(
+        values, index_elements, update_cols).returning(WAS_INSERTED)
+    ).scalars().all()
+    n_inserted = sum(inserted)
+    return {"inserted": n_inserted, "updated": len(inserted) - n_inserted,
+            "unchanged": n_rows - len(inserted)}
+
+
+class PaginatedTable:
+    """
+    PostgreSQL database Table whose rows can be SELECTed 1 page at a time.
     Defined to consolidate code shared/redundant between Model classes below.
     """
-    id: orm.Mapped[int] = db.Column(
-        db.Integer, primary_key=True, autoincrement=True)
-    created: orm.Mapped[dt.datetime] = db.Column(db.DateTime, default=utcnow)
 
     @classmethod
     def select_page(cls, *conditions: ColumnExpressionArgument[bool],
-                    page: int = 1, per_page: int = 50) -> Pagination:
+                    page: int = 1, per_page: int = 50,
+                    order_by: Iterable[Any] = ()) -> Pagination:
         """
-        Get 1 page of data SELECTed from DBTable with optional filter
+        Get 1 page of data SELECTed from the table with optional filter
         conditions specified to exclude certain data
         :param conditions: Iterable[ColumnExpressionArgument[bool]]
         :param page: Int, the page number of query results to return
         :param per_page: Int, number of query result rows per returned page
+        :param order_by: Iterable of columns to sort query results by
         :return: Pagination, the filtered query results page
         """
-        return cls.query.filter(and_(True, *conditions)).paginate(
+        return cls.query.filter(and_(True, *conditions)).order_by(
+            *order_by).paginate(
             page=page, per_page=per_page, max_per_page=100, error_out=False
         )
 
     @classmethod
-    def get_pagination_JSON(cls, request_args, **field_types) -> Dict[str, Any]:
-        """ 
-        Run a SELECT query on the DBTable and return requested rows
-        :return: Dict[str, Any] of JSON data mapping "items" to a list of dicts
-                mapping DBTable field/column names to their values in all rows
-                that match the specified filter conditions
+    def get_page_params(cls, request_args, **field_types) -> Dict[str, Any]:
+        """
+        :param request_args: MultiDict of HTTP request URL parameters
+        :param field_types: Mapping[str, Callable] of the names of filter
+                            parameters to functions to convert them from
+                            strings into the right type
+        :return: Dict[str, Any] of keyword arguments for run_page_query
         """
         params = dict(
             page=request_args.get("page", type=int, default=1),
@@ -68,10 +120,27 @@ class DBTable:
         )
         for field_name, field_type in field_types.items():
             params[field_name] = request_args.get(field_name, type=field_type)
-        result_page = cls.run_page_query(**params)
-        return jsonify(page=result_page.page,
-                       items=[row.to_dict() for row in result_page.items],
-                       total=result_page.total, next=result_page.next_num)
+        return params
+
+    @classmethod
+    def get_page_dict(cls, request_args, **field_types) -> Dict[str, Any]:
+        """
+        Run a SELECT query on the table and return requested rows
+        :param request_args: MultiDict of HTTP request URL parameters
+        :param field_types: Mapping[str, Callable] of the names of filter
+                            parameters to functions to convert them from
+                            strings into the right type
+        :return: Dict[str, Any] mapping "items" to a list of dicts mapping
+                 DBTable field/column names to their values in all rows that
+                 match the specified filter conditions, and "page", "total",
+                 and "next" to the page number, number of matching rows, and
+                 next page number
+        """
+        result_page = cls.run_page_query(**cls.get_page_params(
+            request_args, **field_types))
+        return dict(page=result_page.page,
+                    items=[row.to_dict() for row in result_page.items],
+                    total=result_page.total, next=result_page.next_num)
 
     def to_dict(self):
         raise NotImplementedError(f"{self.__class__.__name__} needs to "
@@ -80,7 +149,7 @@ class DBTable:
     @classmethod
     def run_page_query(cls, page: int = 1, per_page: int = 50) -> Pagination:
         """
-        Get 1 page of data SELECTed from DBTable
+        Get 1 page of data SELECTed from the table
         :param page: Int, the page number of query results to return
         :param per_page: Int, number of query result rows per returned page
         :return: Pagination, the query results page
@@ -88,6 +157,17 @@ class DBTable:
         return cls.select_page(page=page, per_page=per_page)
 
 
+class DBTable(PaginatedTable):
+    """
+    PostgreSQL database Table with at least 2 columns, unique int ID and 
+    date-timestamp of the moment of each row's creation in the database.
+    Defined to consolidate code shared/redundant between Model classes below.
+    """
+    id: orm.Mapped[int] = db.Column(
+        db.Integer, primary_key=True, autoincrement=True)
+    created: orm.Mapped[dt.datetime] = db.Column(db.DateTime, default=utcnow)
+
+
 class DimensionTable(DBTable):
     """
     DBTable extension with at least 1 other column, the date-timestamp of the
@@ -98,6 +178,141 @@ class DimensionTable(DBTable):
                                                  onupdate=utcnow)
 
 
+class DataVersion(db.Model, DimensionTable):
+    """
+    data_version PostgreSQL DBTable counting how many times the data in each
+    other DBTable has changed, so that caches of that data know when to
+    refresh
+    """
+    table_name: orm.Mapped[str] = db.Column(db.String(50), nullable=False,
+                                            unique=True)
+    version: orm.Mapped[int] = db.Column(db.Integer, nullable=False,
+                                         default=0)
+
+    @classmethod
+    def bump(cls, table_name: str) -> None:
+        """
+        Record that the data in a DBTable changed. Run this in the same
+        transaction as the change, before committing it.
+        :param table_name: String naming the DBTable whose data changed
+        """
+        version_upsert = insert(cls).values(table_name=table_name, version=1)
+        db.session.execute(version_upsert.on_conflict_do_update(
+            index_elements=["table_name"],
+            set_=dict(version=cls.version + 1, updated=utcnow())
+        ))
+
+    @classmethod
+    def get(cls, table_name: str) -> int:
+        """
+        :param table_name: String naming a DBTable
+        :return: Int, the number of times that table_name's data has changed
+        """
+        return db.session.execute(db.select(cls.version).filter_by(
+            table_name=table_name)).scalar() or 0
+
+
+class IngestRun(db.Model, DBTable):
+    """
+    ingest_run PostgreSQL DBTable logging when each data ingest ran, on which
+    host, how long it took, and how many rows it changed in each DBTable
+    """
+    host: orm.Mapped[str] = db.Column(db.String(255), nullable=False)
+    status: orm.Mapped[str] = db.Column(db.String(20), nullable=False,
+                                        default="running")
+    finished: orm.Mapped[Optional[dt.datetime]] = db.Column(db.DateTime)
+    duration_seconds: orm.Mapped[Optional[float]] = db.Column(db.Float)
+    # Numbers of rows inserted or updated, and of rows left unchanged
+    weather_rows: orm.Mapped[Optional[int]] = db.Column(db.Integer)
+    yield_rows: orm.Mapped[Optional[int]] = db.Column(db.Integer)
+    unchanged_rows: orm.Mapped[Optional[int]] = db.Column(db.Integer)
+    error: orm.Mapped[Optional[str]] = db.Column(db.Text)
+
+    # Columns added after the first version of this DBTable
+    ADDED_COLUMNS = ("unchanged_rows", )
+
+    @classmethod
+    def create_table(cls) -> None:
+        """
+        Create the ingest_run DBTable if it does not exist, and add any
+        columns that it is missing from being created by an older version
+        """
+        cls.__table__.create(db.engine, checkfirst=True)
+        with db.engine.begin() as conn:
+            for col_name in cls.ADDED_COLUMNS:
+                column = cls.__table__.c[col_name]
+                conn.execute(sa.text(
+                    f"ALTER TABLE {cls.__tablename__} ADD COLUMN IF NOT "
+                    f"EXISTS {col_name} "
+                    f"{column.type.compile(dialect=conn.dialect)}"
+                ))
+
+    @classmethod
+    def start(cls) -> "IngestRun":
+        """
+        :return: IngestRun, a newly committed row for an ingest starting now
+        """
+        run = cls(host=socket.gethostname(), created=utcnow())
+        db.session.add(run)
+        db.session.commit()
+        run.started_at = time.monotonic()  # Not a column; only for duration
+        return run
+
+    def finish(self, error: Optional[str] = None,
+               **row_counts: int) -> None:
+        """
+        Record that this ingest finished, then commit
+        :param error: String describing why the ingest failed, or None if it
+                      succeeded
+        :param row_counts: Mapping[str, int] of IngestRun row count column
+                           names to the number of rows loaded
+        """
+        self.finished = utcnow()
+        self.duration_seconds = time.monotonic() - self.started_at
+        self.status = "failed" if error else "succeeded"
+        self.error = error
+        for col_name, n_rows in row_counts.items():
+            setattr(self, col_name, n_rows)
+        db.session.commit()
+
+    @classmethod
+    def succeeded_since(cls, moment: dt.datetime) -> bool:
+        """
+        :param moment: datetime.datetime in UTC
+        :return: True if any ingest finished successfully after moment
+        """
+        return db.session.execute(db.select(db.exists().where(
+            cls.status == "succeeded", cls.finished > moment
+        ))).scalar()
+
+    @classmethod
+    def run_page_query(cls, page: int = 1, per_page: int = 50) -> Pagination:
+        """
+        Get 1 page of IngestRuns, newest first
+        :param page: Int, the page number of query results to return
+        :param per_page: Int, number of query result rows per returned page
+        :return: Pagination, the query results page
+        """
+        return cls.query.order_by(cls.id.desc()).paginate(
+            page=page, per_page=per_page, max_per_page=100, error_out=False
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get a DB row as a dict
+        :return: Dict[str, Any] mapping column names to their values in a
+                 given row of the ingest_run PostgreSQL DBTable
+        """
+        return {"id": self.id, "host": self.host, "status": self.status,
+                "created": self.created.isoformat(),
+                "finished": (self.finished.isoformat() if self.finished
+                             else None),
+                "duration_seconds": self.duration_seconds,
+                "weather_rows": self.weather_rows,
+                "yield_rows": self.yield_rows,
+                "unchanged_rows": self.unchanged_rows, "error": self.error}
+
+
 class OnlineDataFile:
     """
     File existing online (namely in a GitHub repo) with data to download.
@@ -178,48 +393,123 @@ class GitHubRepoAPI:
                 self.download(as_HTTPS_URL(*self.URL_parts, subdir)).json()]
 
 
-class WeatherReport(db.Model, DBTable):
+class LocalDataFile(OnlineDataFile):
     """
-    weather_report PostgreSQL DBTable represented in ORM for data access
+    File existing on the local filesystem (e.g. synthetic benchmark data)
+    with the same interface as an OnlineDataFile, so that the same Model
+    methods can load it.
+    """
+
+    def __init__(self, name: str, path: str) -> None:
+        """
+        :param name: String, the exact filename including its extension.
+        :param path: String, the local path to the file.
+        """
+        super().__init__(name, path, read_text_file)
+
+    def download_and_read(self) -> str:
+        """
+        Read this file's contents from the local filesystem.
+        :return: String, all text contents of this LocalDataFile.
+        """
+        return self.download(self.path)
+
+
+class LocalDataDir:
+    """
+    Local directory of data files laid out like the data source GitHub repo,
+    with one subdirectory per kind of data file to load
+    """
+
+    def __init__(self, root: str, data_subdirs: List[str]) -> None:
+        """
+        :param root: String, valid path to a local directory containing
+                     data_subdirs
+        :param data_subdirs: List[str] of subdirectory relative paths that 
+                             contain data text files to read all of
+        """
+        self.root = root
+        self.files_in = {subdir: self.get_data_files_in(subdir)
+                         for subdir in data_subdirs}
+
+    def get_data_files_in(self, subdir: str) -> List[LocalDataFile]:
+        """
+        :param subdir: String, relative path to this directory's subdirectory
+                       containing data files to read
+        :return: List[LocalDataFile] ready to read, sorted by filename
+        """
+        dirpath = os.path.join(self.root, subdir)
+        return [LocalDataFile(fname, os.path.join(dirpath, fname))
+                for fname in sorted(os.listdir(dirpath))]
+
+
+class WeatherData(PaginatedTable):
+    """
+    PostgreSQL database Table of daily weather reports from each weather
+    station, with the shared queries that the API runs on it regardless of
+    how the table stores its data.
+    Defined to consolidate code shared/redundant between Model classes below.
     """
-    __table_args__ = (  # Each WeatherStation has only one report per day
-        db.UniqueConstraint("station_id", "date", name="uix_station_date"),
-    )
     # Numeric non-metadata fields/columns of any given weather data report
     FIELDS = ("date", "max_temp", "min_temp", "precipitation")
 
-    # Fields specific to this DB Table
-    max_temp: orm.Mapped[float] = db.Column(db.Float(precision=1))
-    min_temp: orm.Mapped[float] = db.Column(db.Float(precision=1))
-    date: orm.Mapped[dt.date] = db.Column(db.Date, nullable=False)
-    precipitation: orm.Mapped[int] = db.Column(db.Integer)
+    # Fields of each report that the API returns
+    API_FIELDS = (*FIELDS, "station_id")
 
-    station_id = db.Column(db.Integer, db.ForeignKey("weather_station.id"),
-                           nullable=False)
+    # Fields that /api/weather/summary can calculate statistics of
+    SUMMARY_COLS = ("max_temp", "min_temp", "precipitation")
 
-    def __repr__(self) -> str:
-        return (f"<{self.min_temp}C to {self.max_temp}C with "
-                f"{self.precipitation}cm precip at "
-                f"{self.location} on {self.date}>")
+    # Statistics that /api/weather/summary can calculate, mapped to functions
+    # that build each one's SQL aggregate from a column; see get_summary_fn
+    SUMMARY_STATS: Dict[str, Callable] = {
+        "avg": lambda col: sa.cast(sa.func.avg(col), sa.Float),
+        "max": sa.func.max, "min": sa.func.min,
+        "stddev": lambda col: sa.cast(sa.func.stddev_samp(col), sa.Float),
+        "sum": sa.func.sum,
+    }
+
+    # Groups that /api/weather/summary can calculate statistics for, mapped
+    # to functions that get each group's labeled column from the class
+    SUMMARY_GROUPS: Dict[str, Callable] = {
+        "station": lambda cls: cls.station_id.label("station_id"),
+        "year": lambda cls: sa.cast(sa.extract("year", cls.date),
+                                    sa.Integer).label("year"),
+        "month": lambda cls: sa.cast(sa.extract("month", cls.date),
+                                     sa.Integer).label("month"),
+    }
 
     @classmethod
-    def convert_data_in(cls, row: Mapping[str, str],
-                        station_id: int) -> Dict[str, Any]:
+    def to_API_units(cls, col_name: str,
+                     expression: sa.ColumnElement) -> sa.ColumnElement:
         """
-        Transform downloaded text data into the correct format to store in the
-        weather_report PostgreSQL DBTable: identify nulls and fix types
-        :param row: Mapping[str, str] of column names to their values in a row
-        :param station_id: Int uniquely identifying the WeatherStation that
-                           this WeatherReport is from
-        :return: Dict[str, Any], a row ready to add to the weather_report
-                 PostgreSQL DBTable
+        :param col_name: String naming the column that expression is or is
+                         calculated from
+        :param expression: sa.ColumnElement, a column or aggregate of it
+        :return: sa.ColumnElement, expression in the units the API returns
         """
-        row = {k: None if v.strip() == "-9999" else v for k, v in row.items()}
-        return {"station_id": station_id,
-                "date": dt.datetime.strptime(row.pop("date").strip(), "%Y%m%d").date(),
-                "max_temp": as_unit_or_null("max_temp", float, row, 0.1),
-                "min_temp": as_unit_or_null("min_temp", float, row, 0.1),
-                "precipitation": as_unit_or_null("precipitation", int, row, 100)}
+        return expression
+
+    @classmethod
+    def aggregate(cls, col_name: str, agg_fn: Callable) -> sa.ColumnElement:
+        """
+        :param col_name: String naming the numerical column to aggregate
+        :param agg_fn: Callable, function that accepts a column of numerical
+                       data and returns an SQL aggregate expression of it
+        :return: sa.ColumnElement, the aggregate in the units the API returns
+        """
+        return cls.to_API_units(col_name, agg_fn(getattr(cls, col_name)))
+
+    @classmethod
+    def get_API_columns(cls, fields: Optional[Iterable[str]] = None
+                        ) -> List[sa.ColumnElement]:
+        """
+        :param fields: Iterable[str] naming the columns to get, or None to
+                       get every column in API_FIELDS
+        :return: List[sa.ColumnElement] of the columns in the units the API
+                 returns, each labeled with its field name
+        """
+        return [cls.to_API_units(field, getattr(cls, field)).label(field)
+                for field in (cls.API_FIELDS if fields is None else fields)]
 
     @classmethod
     def run_page_query(cls, station_id: Optional[int] = None,
@@ -227,7 +517,7 @@ class WeatherReport(db.Model, DBTable):
                        min_date: Optional[dt.date] = None,
                        page: int = 1, per_page: int = 50) -> Pagination:
         """
-        Get 1 page of data SELECTed from weather_report DBTable with optional
+        Get 1 page of data SELECTed from the weather data table with optional
         filter conditions specified
         :param station_id: Int uniquely identifying the WeatherStation that
                            this WeatherReport is from
@@ -237,7 +527,26 @@ class WeatherReport(db.Model, DBTable):
                          rows from the query result
         :param page: Int, the page number of query results to return
         :param per_page: Int, number of query result rows per returned page
-        :return: Pagination, the date-/station-filtered query results page
+        :return: Pagination, the date-/station-filtered query results page,
+                 sorted by station and date like WeatherStore.select_page
+        """
+        return cls.select_page(*cls.get_filter_conditions(
+            station_id, max_date, min_date), page=page, per_page=per_page,
+            order_by=(cls.station_id, cls.date))
+
+    @classmethod
+    def get_filter_conditions(cls, station_id: Optional[int] = None,
+                              max_date: Optional[dt.date] = None,
+                              min_date: Optional[dt.date] = None
+                              ) -> List[ColumnExpressionArgument[bool]]:
+        """
+        :param station_id: Int uniquely identifying the WeatherStation that
+                           this WeatherReport is from
+        :param max_date: datetime.Date after which to exclude WeatherReport
+                         rows from the query result
+        :param max_date: datetime.Date before which to exclude WeatherReport
+                         rows from the query result
+        :return: List[ColumnExpressionArgument[bool]] of filter conditions
         """
         conditions = list()
         if max_date is not None:
@@ -246,18 +555,276 @@ class WeatherReport(db.Model, DBTable):
             conditions.append(cls.date >= min_date)
         if station_id is not None:
             conditions.append(cls.station_id == station_id)
-        return cls.select_page(*conditions, page=page, per_page=per_page)
+        return conditions
+
+    @classmethod
+    def select_all(cls, *columns: sa.ColumnElement,
+                   station_id: Optional[int] = None,
+                   max_date: Optional[dt.date] = None,
+                   min_date: Optional[dt.date] = None) -> sa.Select:
+        """
+        :param columns: Iterable[sa.ColumnElement] to SELECT
+        :param station_id: Int uniquely identifying the WeatherStation that
+                           this WeatherReport is from
+        :param max_date: datetime.Date after which to exclude WeatherReport
+                         rows from the query result
+        :param max_date: datetime.Date before which to exclude WeatherReport
+                         rows from the query result
+        :return: sa.Select of every filtered row, in station and date order
+        """
+        return db.select(*columns).where(*cls.get_filter_conditions(
+            station_id, max_date, min_date
+        )).order_by(cls.station_id, cls.date)
+
+    @classmethod
+    def select_batch(cls, selectors: List[Mapping[str, Any]]) -> sa.Select:
+        """
+        Build 1 query for the reports matching any of several selectors by
+        joining the table to the selectors UNNESTed from 3 array parameters,
+        so that PostgreSQL plans it once and does 1 index scan per selector
+        :param selectors: List[Mapping[str, Any]] of dicts which each map
+                          "station_id" to an int, and can map "min_date"
+                          and/or "max_date" to a datetime.Date
+        :return: sa.Select of each selector's position in selectors (as
+                 "selector") and every matching report's API_FIELDS, in
+                 selector and date order
+        """
+        selected = sa.func.unnest(*[sa.bindparam(
+            param, [selector.get(param, default) for selector in selectors],
+            type_=ARRAY(col_type)
+        ) for param, col_type, default in (
+            ("station_id", sa.Integer, None),
+            ("min_date", sa.Date, dt.date.min),
+            ("max_date", sa.Date, dt.date.max)
+        )]).table_valued("station_id", "min_date", "max_date",
+                         with_ordinality="selector").render_derived()
+        return db.select(selected.c.selector, *cls.get_API_columns()).join(
+            selected, sa.and_(cls.station_id == selected.c.station_id,
+                              cls.date.between(selected.c.min_date,
+                                               selected.c.max_date))
+        ).order_by(selected.c.selector, cls.date)
+
+    @classmethod
+    def get_batch(cls, selectors: List[Mapping[str, Any]],
+                  max_rows: Optional[int] = None
+                  ) -> List[List[Dict[str, Any]]]:
+        """
+        :param selectors: List[Mapping[str, Any]] of dicts which each map
+                          "station_id" to an int, and can map "min_date"
+                          and/or "max_date" to a datetime.Date
+        :param max_rows: Int, the most reports to get in total, or None for
+                         no limit
+        :return: List[List[Dict[str, Any]]] of the reports matching each
+                 selector, in the same order as selectors
+        """
+        reports = [list() for _ in selectors]
+        for row in db.session.execute(cls.select_batch(selectors)
+                                      .limit(max_rows)):
+            report = row._asdict()
+            report["date"] = report["date"].isoformat()
+            reports[report.pop("selector") - 1].append(report)
+        return reports
+
+    @classmethod
+    def get_yearly_stats(cls, station_id: Optional[int] = None,
+                         year: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        :param station_id: Int uniquely identifying the only WeatherStation
+                           to include stats from, or None to include all
+        :param year: Int, the only year to include stats from, or None to
+                     include all years
+        :return: List[Dict[str, Any]] of the average minimum and maximum
+                 temperature and total precipitation at each station each year
+        """
+        return [row._asdict() for row in db.session.execute(
+            cls.select_yearly_stats(station_id, year))]
+
+    @classmethod
+    def select_yearly_stats(cls, station_id: Optional[int] = None,
+                            year: Optional[int] = None) -> sa.Select:
+        """
+        :param station_id: Int uniquely identifying the only WeatherStation
+                           to include stats from, or None to include all
+        :param year: Int, the only year to include stats from, or None to
+                     include all years
+        :return: sa.Select of the average minimum and maximum temperature and
+                 total precipitation at each station each year
+        """
+        # Build SQLAlchemy query to get overall yearly weather stats
+        year_col = sa.extract("year", cls.date).label("year")
+        query = db.select(
+            cls.station_id, year_col,
+            cls.aggregate("min_temp", sa.func.avg).label("avg_min_temp_degC"),
+            cls.aggregate("max_temp", sa.func.avg).label("avg_max_temp_degC"),
+            cls.aggregate("precipitation", sa.func.sum
+                          ).label("total_precip_cm")
+        ).group_by(cls.station_id, year_col)
+
+        # Only include the specific year(s) and weather station(s) requested
+        if year is not None:
+            query = query.where(year_col == year)
+        if station_id is not None:
+            query = query.where(cls.station_id == station_id)
+        return query
 
     @classmethod
     def run_math_query_on(cls, col_name: str, math_fn: Callable) -> Any:
         """
         :param col_name: String naming the numerical column in the
-                         weather_report DBTable to run a statistics query on
+                         weather data table to run a statistics query on
         :param math_fn: Callable, function that accepts a column of numerical
                         data and calculates a statistical value to return
         :return: Object, the numerical result of math_fn or None
         """
-        return db.session.execute(math_fn(getattr(cls, col_name))).scalar()
+        return db.session.execute(cls.select_math_queries(
+            {col_name: (col_name, math_fn)})).scalar()
+
+    @classmethod
+    def select_math_queries(cls, math_fns: Mapping[str, Tuple[str, Callable]],
+                            groups: Iterable[str] = (),
+                            **filters: Any) -> sa.Select:
+        """
+        Build 1 query to calculate any number of statistics at once, so
+        that PostgreSQL scans the weather data table only once
+        :param math_fns: Mapping[str, Tuple[str, Callable]] of labels to
+                         return each statistic as, mapped to the name of the
+                         numerical column to calculate it from and a function
+                         that builds its SQL aggregate from a column
+        :param groups: Iterable[str] of SUMMARY_GROUPS to calculate each
+                       statistic separately for, e.g. for each station
+        :param filters: Mapping[str, Any] of get_filter_conditions parameters
+        :return: sa.Select of each group (in order) and its statistics
+        """
+        group_cols = [cls.SUMMARY_GROUPS[group](cls) for group in groups]
+        return db.select(*group_cols, *[
+            cls.aggregate(col_name, math_fn).label(label)
+            for label, (col_name, math_fn) in math_fns.items()
+        ]).where(*cls.get_filter_conditions(**filters)
+                 ).group_by(*group_cols).order_by(*group_cols)
+
+    @classmethod
+    def get_summary_fn(cls, stat: str) -> Optional[Callable]:
+        """
+        :param stat: String naming a SUMMARY_STATS statistic, or "pN" for the
+                     Nth percentile (e.g. "p95")
+        :return: Callable which builds the SQL aggregate of a column, or None
+                 if stat is not a valid statistic name
+        """
+        percentile = re.fullmatch(r"p(100|\d{1,2}(\.\d+)?)", stat)
+        if not percentile:
+            return cls.SUMMARY_STATS.get(stat)
+        fraction = float(percentile.group(1)) / 100
+
+        def percentile_of(col: sa.ColumnElement) -> sa.ColumnElement:
+            # Ordered-set aggregate which interpolates between values; keep
+            # a REAL column's percentiles as precise as the column itself
+            # (e.g. 3.8, not 3.799999952316284)
+            result = sa.func.percentile_cont(fraction).within_group(col)
+            return (sa.cast(result, col.type)
+                    if isinstance(col.type, sa.Float) else result)
+        return percentile_of
+
+    @classmethod
+    def get_summary(cls, cols: Iterable[str], stats: Iterable[str],
+                    groups: Iterable[str] = (),
+                    max_rows: Optional[int] = None, **filters: Any
+                    ) -> List[Dict[str, Any]]:
+        """
+        :param cols: Iterable[str] naming SUMMARY_COLS to summarize
+        :param stats: Iterable[str] naming statistics to calculate for each
+                      column (see get_summary_fn)
+        :param groups: Iterable[str] of SUMMARY_GROUPS to calculate each
+                       statistic separately for, e.g. for each station
+        :param max_rows: Int, the most groups to get, or None for no limit
+        :param filters: Mapping[str, Any] of get_filter_conditions parameters
+        :return: List[Dict[str, Any]] mapping each group to its values and
+                 each column_statistic (e.g. "max_temp_p95") to its value,
+                 reused from memory if the data has not changed since the
+                 same summary was last requested, in any order
+        """
+        # Put the arguments in 1 order, so that requests which only list
+        # them in a different order share 1 cached result
+        cols = tuple(sorted(cols, key=cls.SUMMARY_COLS.index))
+        stats = tuple(sorted(stats))
+        groups = tuple(sorted(groups, key=tuple(cls.SUMMARY_GROUPS).index))
+        filters = tuple(sorted(filters.items()))
+        return summary_cache.get(
+            (cls, DataVersion.get(cls.__tablename__), cols, stats, groups,
+             filters, max_rows),
+            lambda: get_summary_of(cls, cols, stats, groups, filters,
+                                   max_rows))
+
+
+class WeatherReport(db.Model, DBTable, WeatherData):
+    """
+    weather_report PostgreSQL DBTable represented in ORM for data access
+    """
+    __table_args__ = (  # Each WeatherStation has only one report per day
+        db.UniqueConstraint("station_id", "date", name="uix_station_date"),
+    )
+    API_FIELDS = (*WeatherData.API_FIELDS, "id")  # Include surrogate key
+
+    # Fields specific to this DB Table
+    max_temp: orm.Mapped[float] = db.Column(db.Float(precision=1))
+    min_temp: orm.Mapped[float] = db.Column(db.Float(precision=1))
+    date: orm.Mapped[dt.date] = db.Column(db.Date, nullable=False)
+    precipitation: orm.Mapped[int] = db.Column(db.Integer)
+
+    station_id = db.Column(db.Integer, db.ForeignKey("weather_station.id"),
+                           nullable=False)
+
+    # When this app process last checked whether this DBTable is stale (see
+    # is_stale), and what it found
+    stale_checked_at = -float("inf")
+    stale = False
+
+    def __repr__(self) -> str:
+        return (f"<{self.min_temp}C to {self.max_temp}C with "
+                f"{self.precipitation}cm precip at "
+                f"{self.location} on {self.date}>")
+
+    @classmethod
+    def is_stale(cls) -> bool:
+        """
+        Check (at most once every WEATHER_STORE_CHECK_SECONDS) whether data
+        was ingested into weather_report_compact but not into this DBTable
+        since 'flask compact-weather' last copied this DBTable into it
+        :return: True if this DBTable is missing the compact DBTable's
+                 latest changes, so it must not be served; else False
+        """
+        now = time.monotonic()
+        if now - cls.stale_checked_at >= current_app.config.get(
+                "WEATHER_STORE_CHECK_SECONDS", 5):
+            updated = dict(db.session.execute(db.select(
+                DataVersion.table_name, DataVersion.updated
+            ).where(DataVersion.table_name.in_((
+                cls.__tablename__, CompactWeatherReport.__tablename__
+            )))).all())
+            compact = updated.get(CompactWeatherReport.__tablename__)
+            legacy = updated.get(cls.__tablename__)
+            cls.stale = compact is not None and (legacy is None
+                                                 or compact > legacy)
+            cls.stale_checked_at = now
+        return cls.stale
+
+    @classmethod
+    def convert_data_in(cls, row: Mapping[str, str],
+                        station_id: int) -> Dict[str, Any]:
+        """
+        Transform downloaded text data into the correct format to store in the
+        weather_report PostgreSQL DBTable: identify nulls and fix types
+        :param row: Mapping[str, str] of column names to their values in a row
+        :param station_id: Int uniquely identifying the WeatherStation that
+                           this WeatherReport is from
+        :return: Dict[str, Any], a row ready to add to the weather_report
+                 PostgreSQL DBTable
+        """
+        row = {k: None if v.strip() == "-9999" else v for k, v in row.items()}
+        return {"station_id": station_id,
+                "date": dt.datetime.strptime(row.pop("date").strip(), "%Y%m%d").date(),
+                "max_temp": as_unit_or_null("max_temp", float, row, 0.1),
+                "min_temp": as_unit_or_null("min_temp", float, row, 0.1),
+                "precipitation": as_unit_or_null("precipitation", int, row, 100)}
 
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -272,6 +839,295 @@ class WeatherReport(db.Model, DBTable):
         return result
 
 
+class CompactWeatherReport(db.Model, WeatherData):
+    """
+    weather_report_compact PostgreSQL DBTable represented in ORM for data
+    access: an opt-in, narrower weather_report which stores measurements as
+    integers in the data source's units (tenths of a degree Celsius and of a
+    millimeter), keyed by station and date instead of by a surrogate ID, and
+    without per-row timestamps. Queries scale values into weather_report's
+    units, so the API returns the same data (minus IDs) from either table.
+    """
+    __tablename__ = "weather_report_compact"
+    __table_args__ = (  # Each WeatherStation has only one report per day
+        db.PrimaryKeyConstraint("station_id", "date"),
+    )
+    # Divide temperatures and multiply precipitation by these to convert
+    # them from the data source's units into the API's units
+    TEMP_DIVISOR = 10
+    PRECIP_MULTIPLIER = 100
+
+    # Fields declared from widest to narrowest so rows have no padding
+    date: orm.Mapped[dt.date] = db.Column(db.Date, nullable=False)
+    precipitation: orm.Mapped[int] = db.Column(db.Integer)
+    station_id: orm.Mapped[int] = db.Column(
+        db.SmallInteger, db.ForeignKey("weather_station.id"), nullable=False)
+    max_temp: orm.Mapped[int] = db.Column(db.SmallInteger)
+    min_temp: orm.Mapped[int] = db.Column(db.SmallInteger)
+
+    @classmethod
+    def convert_data_in(cls, row: Mapping[str, str],
+                        station_id: int) -> Dict[str, Any]:
+        """
+        Transform downloaded text data into the correct format to store in the
+        weather_report_compact PostgreSQL DBTable: identify nulls, fix types
+        :param row: Mapping[str, str] of column names to their values in a row
+        :param station_id: Int uniquely identifying the WeatherStation that
+                           this report is from
+        :return: Dict[str, Any], a row ready to add to the DBTable
+        """
+        row = {k: None if v.strip() == "-9999" else v for k, v in row.items()}
+        return {"station_id": station_id,
+                "date": dt.datetime.strptime(row.pop("date").strip(),
+                                             "%Y%m%d").date(),
+                "max_temp": as_unit_or_null("max_temp", int, row, 1),
+                "min_temp": as_unit_or_null("min_temp", int, row, 1),
+                "precipitation": as_unit_or_null("precipitation", int, row, 1)}
+
+    @classmethod
+    def copy_from_legacy(cls) -> int:
+        """
+        Create the weather_report_compact DBTable if it does not exist, and
+        copy every new or changed row of weather_report into it, converting
+        the values back into the data source's units
+        :return: Int, the number of rows inserted or updated
+        """
+        cls.__table__.create(db.engine, checkfirst=True)
+        legacy = WeatherReport
+        compact_values = insert(cls).from_select(
+            ["station_id", "date", "max_temp", "min_temp", "precipitation"],
+            db.select(legacy.station_id, legacy.date,
+                      sa.func.round(legacy.max_temp * cls.TEMP_DIVISOR),
+                      sa.func.round(legacy.min_temp * cls.TEMP_DIVISOR),
+                      legacy.precipitation // cls.PRECIP_MULTIPLIER)
+        )
+        n_rows = db.session.execute(upsert_changed(
+            compact_values, ["station_id", "date"],
+            ["max_temp", "min_temp", "precipitation"]
+        )).rowcount
+        if n_rows:
+            DataVersion.bump(cls.__tablename__)
+
+        # Both DBTables now hold the same data, so mark weather_report as
+        # changed at least as recently as this one (see is_stale)
+        DataVersion.bump(legacy.__tablename__)
+        db.session.commit()
+        return n_rows
+
+    @classmethod
+    def aggregate(cls, col_name: str, agg_fn: Callable) -> sa.ColumnElement:
+        """
+        :param col_name: String naming the numerical column to aggregate
+        :param agg_fn: Callable, function that accepts a column of numerical
+                       data and returns an SQL aggregate expression of it
+        :return: sa.ColumnElement, the aggregate in the units the API returns
+        """
+        column = getattr(cls, col_name)
+        if col_name in ("max_temp", "min_temp"):
+            # PostgreSQL averages SMALLINTs as (slower) NUMERICs, but the
+            # integer values convert into floats exactly
+            column = sa.cast(column, sa.Float)
+        return cls.to_API_units(col_name, agg_fn(column))
+
+    @classmethod
+    def to_API_units(cls, col_name: str,
+                     expression: sa.ColumnElement) -> sa.ColumnElement:
+        """
+        :param col_name: String naming the column that expression is or is
+                         calculated from
+        :param expression: sa.ColumnElement, a column or aggregate of it
+        :return: sa.ColumnElement, expression in the units the API returns
+        """
+        if col_name in ("max_temp", "min_temp"):
+            return sa.cast(expression, sa.Float) / cls.TEMP_DIVISOR
+        elif col_name == "precipitation":
+            return expression * cls.PRECIP_MULTIPLIER
+        return expression
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get a DB row as a dict, in the same units as WeatherReport.to_dict
+        :return: Dict[str, Any] mapping column names to their values in a
+                 given row of the weather_report_compact PostgreSQL DBTable
+        """
+        result = {field: getattr(self, field) for field in self.API_FIELDS}
+        for temp in ("max_temp", "min_temp"):
+            if result[temp] is not None:
+                result[temp] /= self.TEMP_DIVISOR
+        if result["precipitation"] is not None:
+            result["precipitation"] *= self.PRECIP_MULTIPLIER
+        result["date"] = result["date"].isoformat()
+        return result
+
+
+def get_summary_of(model: type, cols: Tuple[str, ...],
+                   stats: Tuple[str, ...], groups: Tuple[str, ...],
+                   filters: Tuple[Tuple[str, Any], ...],
+                   max_rows: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    WeatherData.get_summary without summary_cache
+    :param model: WeatherData DBTable class to summarize
+    :param cols: Tuple[str, ...] naming SUMMARY_COLS to summarize
+    :param stats: Tuple[str, ...] naming statistics to calculate
+    :param groups: Tuple[str, ...] of SUMMARY_GROUPS to group reports by
+    :param filters: Tuple[Tuple[str, Any], ...] of get_filter_conditions
+                    parameter names and their values
+    :param max_rows: Int, the most groups to get, or None for no limit
+    :return: List[Dict[str, Any]] of each group and its statistics
+    """
+    math_fns = {f"{col}_{stat}": (col, model.get_summary_fn(stat))
+                for col in cols for stat in stats}
+    return [row._asdict() for row in db.session.execute(
+        model.select_math_queries(math_fns, groups, **dict(filters))
+        .limit(max_rows))]
+
+
+def weather_model() -> type:
+    """
+    :return: CompactWeatherReport if the Flask app is configured to use the
+             compact weather data schema, else WeatherReport
+    """
+    return (CompactWeatherReport if current_app.config.get(
+        "COMPACT_WEATHER_SCHEMA") else WeatherReport)
+
+
+class WeatherNormal(db.Model):
+    """
+    weather_normal PostgreSQL DBTable represented in ORM for data access: the
+    daily climatology of each weather station, i.e. the mean and standard
+    deviation of its reports on each calendar day across every year, in the
+    units that the API returns. Derived from the weather data DBTable, and
+    recalculated for each station whenever its reports change.
+    """
+    __table_args__ = (  # Each WeatherStation has only one normal per day
+        db.PrimaryKeyConstraint("station_id", "month", "day"),
+    )
+    # Weather data fields to calculate the mean and standard deviation of
+    STDDEV_FIELDS = ("max_temp", "min_temp")
+
+    station_id: orm.Mapped[int] = db.Column(
+        db.Integer, db.ForeignKey("weather_station.id"), nullable=False)
+    month: orm.Mapped[int] = db.Column(db.SmallInteger, nullable=False)
+    day: orm.Mapped[int] = db.Column(db.SmallInteger, nullable=False)
+    n_years: orm.Mapped[int] = db.Column(db.Integer, nullable=False)
+    max_temp_mean: orm.Mapped[Optional[float]] = db.Column(db.Float)
+    max_temp_stddev: orm.Mapped[Optional[float]] = db.Column(db.Float)
+    min_temp_mean: orm.Mapped[Optional[float]] = db.Column(db.Float)
+    min_temp_stddev: orm.Mapped[Optional[float]] = db.Column(db.Float)
+    precipitation_mean: orm.Mapped[Optional[float]] = db.Column(db.Float)
+    updated: orm.Mapped[dt.datetime] = db.Column(db.DateTime, default=utcnow,
+                                                 onupdate=utcnow)
+
+    @classmethod
+    def create_table(cls) -> None:
+        """
+        Create the weather_normal DBTable if it does not exist, e.g. in a DB
+        that was set up before it was added, so that ingests can fill it
+        """
+        cls.__table__.create(db.engine, checkfirst=True)
+
+    @staticmethod
+    def get_calendar_day(model: type) -> Tuple[sa.ColumnElement, ...]:
+        """
+        :param model: WeatherData DBTable class
+        :return: Tuple[sa.ColumnElement, ...] of the month and day of the
+                 month of each report, typed to match WeatherNormal's keys
+        """
+        return tuple(sa.cast(sa.extract(part, model.date), sa.SmallInteger
+                             ).label(part) for part in ("month", "day"))
+
+    @classmethod
+    def refresh(cls, model: type,
+                station_ids: Optional[List[int]] = None) -> int:
+        """
+        Recalculate the normals of some or all weather stations from their
+        reports, without committing
+        :param model: WeatherData DBTable class to calculate normals from
+        :param station_ids: List[int] of the WeatherStations whose reports
+                            changed, or None to recalculate every station
+        :return: Int, the number of normals saved
+        """
+        month, day = cls.get_calendar_day(model)
+        normals = db.select(model.station_id, month, day,
+                            sa.func.count().label("n_years"))
+        for field in cls.STDDEV_FIELDS:
+            normals = normals.add_columns(
+                model.aggregate(field, sa.func.avg),
+                model.aggregate(field, sa.func.stddev_samp))
+        normals = normals.add_columns(
+            model.aggregate("precipitation", sa.func.avg)
+        ).group_by(model.station_id, month, day)
+
+        outdated = db.delete(cls)
+        if station_ids is not None:
+            normals = normals.where(model.station_id.in_(station_ids))
+            outdated = outdated.where(cls.station_id.in_(station_ids))
+        db.session.execute(outdated)
+        return db.session.execute(insert(cls).from_select([
+            "station_id", "month", "day", "n_years", "max_temp_mean",
+            "max_temp_stddev", "min_temp_mean", "min_temp_stddev",
+            "precipitation_mean"
+        ], normals)).rowcount
+
+    @classmethod
+    def select_anomalies(cls, model: type, station_id: int,
+                         max_date: Optional[dt.date] = None,
+                         min_date: Optional[dt.date] = None) -> sa.Select:
+        """
+        :param model: WeatherData DBTable class to get daily reports from
+        :param station_id: Int uniquely identifying the WeatherStation to
+                           get reports from
+        :param max_date: datetime.Date after which to exclude reports
+        :param min_date: datetime.Date before which to exclude reports
+        :return: sa.Select of each daily report in date order, joined to
+                 its station's normal for that calendar day, with the
+                 difference between each value and its normal (anomaly) and
+                 that difference in standard deviations (zscore)
+        """
+        month, day = cls.get_calendar_day(model)
+        columns = model.get_API_columns(("date", "station_id"))
+        for field in ("max_temp", "min_temp", "precipitation"):
+            value = model.to_API_units(field, getattr(model, field))
+            normal = getattr(cls, f"{field}_mean")
+            anomaly = value - normal
+            columns += [value.label(field), normal.label(f"{field}_normal"),
+                        (sa.cast(anomaly, value.type)  # As precise as value
+                         if isinstance(value.type, sa.Float) else anomaly
+                         ).label(f"{field}_anomaly")]
+            if field in cls.STDDEV_FIELDS:
+                columns.append((anomaly / sa.func.nullif(
+                    getattr(cls, f"{field}_stddev"), 0)
+                ).label(f"{field}_zscore"))
+        return db.select(*columns).outerjoin(cls, sa.and_(
+            cls.station_id == model.station_id, cls.month == month,
+            cls.day == day
+        )).where(*model.get_filter_conditions(
+            station_id, max_date, min_date
+        )).order_by(model.date)
+
+    @classmethod
+    def get_anomalies(cls, model: type, station_id: int,
+                      max_date: Optional[dt.date] = None,
+                      min_date: Optional[dt.date] = None
+                      ) -> List[Dict[str, Any]]:
+        """
+        :param model: WeatherData DBTable class to get daily reports from
+        :param station_id: Int uniquely identifying the WeatherStation to
+                           get reports from
+        :param max_date: datetime.Date after which to exclude reports
+        :param min_date: datetime.Date before which to exclude reports
+        :return: List[Dict[str, Any]] of each daily report in date order
+                 with its normals and anomalies (see select_anomalies)
+        """
+        anomalies = list()
+        for row in db.session.execute(cls.select_anomalies(
+                model, station_id, max_date, min_date)):
+            anomaly = row._asdict()
+            anomaly["date"] = anomaly["date"].isoformat()
+            anomalies.append(anomaly)
+        return anomalies
+
+
 class WeatherStation(db.Model, DimensionTable):
     """
     weather_station PostgreSQL DBTable represented in ORM for data access
@@ -282,7 +1138,8 @@ class WeatherStation(db.Model, DimensionTable):
                               lazy=True)
 
     @classmethod
-    def load_reports_from(cls, station_file: OnlineDataFile) -> None:
+    def load_reports_from(cls, station_file: OnlineDataFile
+                          ) -> Dict[str, int]:
         """
         Given the path to a text file containing rows of data from this 
         WeatherStation, download that file, extract its contents, transform
@@ -291,6 +1148,8 @@ class WeatherStation(db.Model, DimensionTable):
         :param station_file: OnlineDataFile to download, extract weather 
                              station data (in .tsv text format) from, and
                              load that data from into the DBTable
+        :return: Dict[str, int] counting how many weather reports in the
+                 file were "inserted", "updated", or skipped as "unchanged"
         """
         # Insert new station name into database unless it is a duplicate
         station_name = os.path.splitext(station_file.name)[0]
@@ -309,24 +1168,23 @@ class WeatherStation(db.Model, DimensionTable):
 
         # Download station data and convert it to prepare to load it into DB
         tsv_contents = station_file.download_and_read()
+        model = weather_model()
         reader = csv.DictReader(tsv_contents.split("\n"), delimiter="\t",
-                                fieldnames=WeatherReport.FIELDS,
+                                fieldnames=model.FIELDS,
                                 lineterminator="\n")
-        station_reports = [WeatherReport.convert_data_in(row, station_id)
+        station_reports = [model.convert_data_in(row, station_id)
                            for row in reader]
 
-        # Update metrics on matching station / date
-        report_values = insert(WeatherReport).values(station_reports)
-        report_upsert = report_values.on_conflict_do_update(
-            index_elements=['station_id', 'date'],
-            set_=dict(
-                max_temp=report_values.excluded.max_temp,
-                min_temp=report_values.excluded.min_temp,
-                precipitation=report_values.excluded.precipitation,
-            )
-        )
-        db.session.execute(report_upsert)
+        # Update metrics on matching station / date if they changed
+        counts = run_upsert(insert(model).values(station_reports),
+                            ["station_id", "date"],
+                            ["max_temp", "min_temp", "precipitation"],
+                            len(station_reports))
+        if counts["inserted"] or counts["updated"]:
+            WeatherNormal.refresh(model, [station_id])
+            DataVersion.bump(model.__tablename__)
         db.session.commit()
+        return counts
 
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -347,7 +1205,7 @@ class CropYield(db.Model, DBTable):
     corn_bushels: orm.Mapped[int] = db.Column(db.Integer, nullable=False)
 
     @classmethod
-    def load_yields_from(cls, yield_file: OnlineDataFile) -> None:
+    def load_yields_from(cls, yield_file: OnlineDataFile) -> Dict[str, int]:
         """
         Given the path to a text file containing rows of yearly CropYield
         data, download that file, extract its contents, transform them into
@@ -355,6 +1213,8 @@ class CropYield(db.Model, DBTable):
         :param station_file: OnlineDataFile to download, extract crop yield 
                              data (in .tsv text format) from, and load that
                              data from into the DBTable
+        :return: Dict[str, int] counting how many yearly crop yields in the
+                 file were "inserted", "updated", or skipped as "unchanged"
         """
         tsv_name = yield_file.name  # TODO Is this needed?
         tsv_contents = yield_file.download_and_read()
@@ -364,15 +1224,12 @@ class CropYield(db.Model, DBTable):
 
         yields = [{k: int(v.strip())
                    for k, v in x.items()} for x in reader]  # TODO OPTIMIZE
-        yield_values = insert(cls).values(yields)
-        yield_upsert = yield_values.on_conflict_do_update(
-            index_elements=['year'],
-            set_=dict(
-                corn_bushels=yield_values.excluded.corn_bushels,
-            )
-        )
-        db.session.execute(yield_upsert)
+        counts = run_upsert(insert(cls).values(yields), ["year"],
+                            ["corn_bushels"], len(yields))
+        if counts["inserted"] or counts["updated"]:
+            DataVersion.bump(cls.__tablename__)
         db.session.commit()
+        return counts
 
     def to_dict(self) -> Dict[str, Any]:
         """
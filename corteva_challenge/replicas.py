@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Greg Conan: gregmconan@gmail.com
+Created: 2026-10-19
+Updated: 2026-10-19
+"""
+# Import standard libraries
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# PyPI imports
+from flask import current_app, Flask, g, has_app_context
+from flask_sqlalchemy.session import Session
+import sqlalchemy as sa
+
+# Local custom imports
+from corteva_challenge.utilities import log
+
+# Prefix of the SQLALCHEMY_BINDS keys of read replica DB engines
+REPLICA_PREFIX = "replica_"
+
+
+class ReplicaRouter:
+    """
+    Chooses which read replica each API request reads from, taking turns
+    between every replica which responds and, unless read-your-writes is
+    off, has caught up to the primary's latest DataVersions. Requests read
+    from the primary if no replica qualifies. Ingests, other writes, and
+    DDL always use the primary.
+    """
+
+    def __init__(self) -> None:
+        self.bind_keys: List[str] = list()
+        self.check_interval = 5.0
+        self.checked_at = -float("inf")
+        self.checker: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+        self.read_your_writes = True
+        self.turn = itertools.count()
+        self.usable: List[str] = list()
+
+    def init_app(self, app: Flask) -> None:
+        """
+        Route reads to the read replicas in the app's SQLALCHEMY_BINDS
+        :param app: Flask app whose config to read settings from
+        """
+        self.bind_keys = [key for key in app.config.get("SQLALCHEMY_BINDS",
+                                                        dict())
+                          if key.startswith(REPLICA_PREFIX)]
+        self.check_interval = app.config.get("REPLICA_CHECK_SECONDS",
+                                             self.check_interval)
+        self.read_your_writes = app.config.get("REPLICA_READ_YOUR_WRITES",
+                                               self.read_your_writes)
+        self.checked_at = -float("inf")
+        self.usable = list()
+
+    def check(self) -> None:
+        """
+        Check which replicas respond and have every change that the primary
+        has, and make requests read only from those
+        """
+        started = time.monotonic()
+        engines = current_app.extensions["sqlalchemy"].engines
+        latest = (get_versions(engines[None], "primary")
+                  if self.read_your_writes else dict())
+        usable = list()
+        for key in self.bind_keys:
+            versions = get_versions(engines[key], key)
+            if versions is None:
+                continue
+            if latest and any(versions.get(table, 0) < version
+                              for table, version in latest.items()):
+                log(f"Reading from primary instead of {key} until it "
+                    "catches up")
+                continue
+            usable.append(key)
+        self.usable = usable
+        self.checked_at = started
+
+    def check_soon(self) -> None:
+        """
+        If the last check was at least check_interval seconds ago, start
+        checking the replicas again in a background thread. Only 1 thread
+        checks at a time, and requests keep using the last check's results
+        instead of waiting, e.g. for a replica that is down to time out.
+        """
+        if time.monotonic() - self.checked_at < self.check_interval:
+            return
+        if not self.lock.acquire(blocking=False):  # Another thread checks
+            return
+        if time.monotonic() - self.checked_at < self.check_interval:
+            self.lock.release()
+            return
+        self.checker = threading.Thread(
+            target=self.check_in_background, daemon=True,
+            args=(current_app._get_current_object(), ))
+        self.checker.start()
+
+    def check_in_background(self, app: Flask) -> None:
+        """
+        :param app: Flask app whose DB engines to check
+        """
+        try:
+            with app.app_context():
+                self.check()
+        except Exception as err:  # Keep using the last check's results
+            log(f"Could not check read replicas: {err}", logging.WARNING)
+        finally:
+            self.lock.release()
+
+    def choose_engine(self) -> Optional[sa.Engine]:
+        """
+        :return: sqlalchemy.Engine of the next usable replica to read from,
+                 or None to read from the primary
+        """
+        if not self.bind_keys:
+            return None
+        self.check_soon()
+        usable = self.usable
+        if not usable:
+            return None
+        key = usable[next(self.turn) % len(usable)]
+        return current_app.extensions["sqlalchemy"].engines[key]
+
+    def route_reads(self) -> None:
+        """
+        Make the current request read from the next usable replica; all of
+        its reads use the same one so that they see the same data
+        """
+        g.read_engine = self.choose_engine()
+
+
+def get_versions(engine: sa.Engine, name: str) -> Optional[Dict[str, int]]:
+    """
+    :param engine: sqlalchemy.Engine of the primary DB or a read replica
+    :param name: String naming the DB, to log if it cannot be reached
+    :return: Dict[str, int] mapping each DBTable name to its DataVersion, or
+             None if the DB did not respond
+    """
+    try:
+        with engine.connect() as conn:
+            return dict(conn.execute(sa.text(
+                "SELECT table_name, version FROM data_version")).all())
+    except sa.exc.ProgrammingError:  # No data_version DBTable yet
+        return dict()
+    except sa.exc.OperationalError as err:
+        log(f"Could not reach {name} DB: {err.orig}", logging.WARNING)
+        return None
+
+
+class RoutingSession(Session):
+    """
+    Flask-SQLAlchemy session which runs SELECT statements on the read
+    replica that ReplicaRouter chose for the current request, if any
+    """
+
+    def get_bind(self, mapper: Optional[Any] = None,
+                 clause: Optional[Any] = None,
+                 bind: Optional[Any] = None, **kwargs: Any) -> Any:
+        if bind is None and isinstance(clause, sa.Select) \
+                and has_app_context():
+            read_engine = g.get("read_engine")
+            if read_engine is not None:
+                return read_engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind,
+                                **kwargs)
+
+
+replicas = ReplicaRouter()
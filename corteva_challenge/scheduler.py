@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Greg Conan: gregmconan@gmail.com
+Created: 2026-10-19
+Updated: 2026-10-19
+"""
+# Import standard libraries
+from collections.abc import Callable
+import datetime as dt
+import logging
+import time
+from typing import Dict, Optional
+
+# PyPI imports
+from flask import Flask
+import sqlalchemy as sa
+
+# Local custom imports
+from corteva_challenge.models import db, IngestRun
+from corteva_challenge.utilities import log, utcnow
+
+# Arbitrary int64 identifying the ingest lock among all PostgreSQL advisory
+# locks; every app instance must use the same one
+INGEST_LOCK_KEY = 2024071301
+
+
+def run_ingest_once(ingest_fn: Callable[[], Dict[str, int]],
+                    min_interval: float = 0) -> Optional[IngestRun]:
+    """
+    Run an ingest unless another app instance is already running one, or
+    one already succeeded within the last min_interval seconds. A PostgreSQL
+    advisory lock held on its own connection ensures that only 1 instance
+    ingests at a time; PostgreSQL releases it if that instance dies.
+    :param ingest_fn: Function which ingests data and returns a Dict[str, int]
+                      of IngestRun row count column names to the number of
+                      rows it loaded into each DBTable
+    :param min_interval: Float, number of seconds after an ingest succeeds
+                         during which to skip running another
+    :return: IngestRun recording this ingest's duration and row counts, or
+             None if no ingest ran
+    """
+    lock_args = {"key": INGEST_LOCK_KEY}
+    with db.engine.connect().execution_options(
+            isolation_level="AUTOCOMMIT") as lock_conn:
+        if not lock_conn.execute(sa.text(
+                "SELECT pg_try_advisory_lock(:key)"), lock_args).scalar():
+            log("Skipped ingest: another instance is already ingesting")
+            return None
+        try:
+            if min_interval and IngestRun.succeeded_since(
+                    utcnow() - dt.timedelta(seconds=min_interval)):
+                log("Skipped ingest: another instance ingested recently")
+                return None
+            run = IngestRun.start()
+            try:
+                row_counts = ingest_fn()
+            except Exception as err:
+                db.session.rollback()
+                run.finish(error=repr(err))
+                raise
+            run.finish(**row_counts)
+            return run
+        finally:
+            lock_conn.execute(sa.text("SELECT pg_advisory_unlock(:key)"),
+                              lock_args)
+
+
+def run_scheduler(app: Flask, ingest_fn: Callable[[], Dict[str, int]],
+                  interval: float, max_runs: Optional[int] = None) -> None:
+    """
+    Try to ingest data every interval seconds, e.g. in a worker process
+    separate from the gunicorn workers. Every instance of the app can run
+    this: each ingest's new DataVersions tell API workers in every instance
+    to refresh their caches.
+    :param app: Flask app to run each ingest in the app context of
+    :param ingest_fn: Function which ingests data and returns a Dict[str, int]
+                      of IngestRun row count column names to the number of
+                      rows it loaded into each DBTable
+    :param interval: Float, number of seconds between ingests
+    :param max_runs: Int, number of times to try ingesting before returning,
+                     or None to keep trying forever
+    """
+    n_runs = 0
+    while max_runs is None or n_runs < max_runs:
+        started = time.monotonic()
+        with app.app_context():
+            # Skip ingesting if any instance did within half an interval:
+            # each instance's timer drifts, and a whole interval would skip
+            # this instance's own next ingest if the last one took a while
+            try:  # Keep the schedule going even if 1 ingest fails
+                run = run_ingest_once(ingest_fn, min_interval=interval / 2)
+                if run is not None:
+                    log(f"Ingest changed {run.weather_rows} weather "
+                        f"reports and {run.yield_rows} crop yields, and left "
+                        f"{run.unchanged_rows} rows unchanged, in "
+                        f"{run.duration_seconds:.1f} seconds")
+            except Exception as err:
+                log(f"Scheduled ingest failed: {err!r}", logging.ERROR)
+        n_runs += 1
+        if max_runs is None or n_runs < max_runs:
+            time.sleep(max(interval - (time.monotonic() - started), 0))
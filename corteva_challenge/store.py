@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Greg Conan: gregmconan@gmail.com
+Created: 2026-10-19
+Updated: 2026-10-19
+"""
+# Import standard libraries
+import datetime as dt
+import fcntl
+import functools
+import glob
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# PyPI imports
+from flask import current_app, Flask
+import numpy as np
+import pandas as pd
+
+# Local custom imports
+from corteva_challenge.models import db, DataVersion, weather_model
+from corteva_challenge.utilities import log
+
+# Columns of the weather data DBTable to snapshot (if it has them), mapped
+# to their dtypes
+COLUMNS = {"id": np.int64, "station_id": np.int32, "date": "datetime64[D]",
+           "max_temp": np.float64, "min_temp": np.float64,
+           "precipitation": np.float64}
+
+# Columns where NaN in the snapshot represents NULL in the DBTable
+NULLABLE_COLUMNS = ("max_temp", "min_temp", "precipitation")
+
+# Multiplier to combine a station ID and a date into 1 sortable int64 key
+STATION_KEY_SCALE = np.int64(2 ** 32)
+
+
+class WeatherStore:
+    """
+    Read-only columnar copy of the weather data DBTable held in NumPy
+    arrays, sorted by station and date, to answer /api/weather and
+    /api/weather/stats queries without querying PostgreSQL. Each data version
+    is saved once as a directory of .npy files which every app process
+    memory-maps, so that gunicorn workers share its memory pages.
+    """
+
+    def __init__(self) -> None:
+        self.snapshot_dir: Optional[str] = None
+        self.check_interval = 5.0
+        self.builder: Optional[threading.Thread] = None
+        self.checked_at = -np.inf
+        self.lock = threading.Lock()
+        self.snapshot: Optional[WeatherSnapshot] = None
+
+    def init_app(self, app: Flask) -> None:
+        """
+        Enable this WeatherStore if app configures a WEATHER_SNAPSHOT_DIR
+        :param app: Flask app whose config to read settings from
+        """
+        self.snapshot_dir = app.config.get("WEATHER_SNAPSHOT_DIR")
+        self.check_interval = app.config.get("WEATHER_STORE_CHECK_SECONDS",
+                                             self.check_interval)
+        self.snapshot = None
+        self.checked_at = -np.inf
+
+    def path_to(self, version: int) -> str:
+        """
+        :param version: Int, a DataVersion of the weather data DBTable
+        :return: String, path to the snapshot directory for that version
+        """
+        return os.path.join(self.snapshot_dir,
+                            f"{weather_model().__tablename__}.v{version}")
+
+    def build_snapshot(self) -> Optional[str]:
+        """
+        Save the current weather data DBTable as .npy files, unless a
+        snapshot of its current version already exists; processes on the
+        same host take turns, so that only 1 of them saves each version
+        :return: String, path to the snapshot directory, or None if this
+                 WeatherStore is disabled
+        """
+        if not self.snapshot_dir:
+            return None
+
+        # Only 1 process on this host builds a snapshot at a time; the rest
+        # wait for it, then find the snapshot that it built
+        model = weather_model()
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        with open(os.path.join(self.snapshot_dir,
+                               f"{model.__tablename__}.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            return self.build_snapshot_of(model)
+
+    def build_snapshot_of(self, model: type) -> str:
+        """
+        :param model: WeatherData DBTable class to save a snapshot of
+        :return: String, path to the snapshot directory
+        """
+        # Read the version before the data, so that a concurrent ingest
+        # can only make the snapshot look older than it is, not newer
+        version = DataVersion.get(model.__tablename__)
+        snapshot_path = self.path_to(version)
+        if os.path.isdir(snapshot_path):
+            return snapshot_path
+
+        columns = [col for col in COLUMNS if col in model.API_FIELDS]
+        query = model.select_all(*model.get_API_columns(columns))
+        with db.engine.connect() as conn:
+            df = pd.read_sql_query(query, conn)
+
+        # Write into a temporary directory, then rename it all at once, so
+        # that other processes never load an incomplete snapshot
+        tmp_path = f"{snapshot_path}.tmp{os.getpid()}"
+        os.makedirs(tmp_path, exist_ok=True)
+        for col in columns:
+            np.save(os.path.join(tmp_path, f"{col}.npy"),
+                    df[col].to_numpy(dtype=COLUMNS[col]))
+        np.save(os.path.join(tmp_path, "key.npy"), as_key(
+            df["station_id"].to_numpy(dtype=np.int64),
+            df["date"].to_numpy(dtype="datetime64[D]")
+        ))
+        try:
+            os.rename(tmp_path, snapshot_path)
+        except OSError:  # Another process saved this version first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+        # Delete all but the 2 newest snapshots; on POSIX, processes that
+        # still have an old snapshot memory-mapped can keep reading it
+        for old_path in glob.glob(os.path.join(
+                self.snapshot_dir, f"{model.__tablename__}.v*")):
+            old_version = os.path.basename(old_path).rsplit(".v", 1)[-1]
+            if old_version.isdigit() and int(old_version) < version - 1:
+                shutil.rmtree(old_path, ignore_errors=True)
+        return snapshot_path
+
+    def is_fresh(self) -> bool:
+        """
+        Check (at most once every check_interval seconds) whether the
+        weather data DBTable has changed, and if so, load the snapshot of
+        its current version if one exists
+        :return: True if this WeatherStore has loaded a snapshot of the
+                 current data version; else False to fall back to SQL
+        """
+        if not self.snapshot_dir:
+            return False
+        now = time.monotonic()
+        if now - self.checked_at >= self.check_interval:
+            with self.lock:
+                if now - self.checked_at >= self.check_interval:
+                    self.refresh(DataVersion.get(
+                        weather_model().__tablename__))
+                    self.checked_at = now
+        return self.snapshot is not None
+
+    def refresh(self, version: int) -> None:
+        """
+        Replace the loaded WeatherSnapshot in 1 assignment, so that
+        concurrent readers see either the old snapshot or the new one
+        :param version: Int, the current DataVersion of the weather data
+        """
+        if self.snapshot is not None and self.snapshot.version == version:
+            return
+        snapshot_path = self.path_to(version)
+        if os.path.isdir(snapshot_path):
+            self.snapshot = WeatherSnapshot(snapshot_path, version)
+        else:  # Stale; answer queries with SQL until there is a snapshot
+            self.snapshot = None
+            if self.builder is None or not self.builder.is_alive():
+                log(f"Building weather data snapshot for version {version}")
+                self.builder = threading.Thread(
+                    target=self.build_in_background, daemon=True,
+                    args=(current_app._get_current_object(), ))
+                self.builder.start()
+
+    def build_in_background(self, app: Flask) -> None:
+        """
+        Build the missing snapshot of the current data version, then make
+        the next request load it
+        :param app: Flask app whose DB to read the weather data from
+        """
+        try:
+            with app.app_context():
+                self.build_snapshot()
+            self.checked_at = -np.inf
+        except Exception as err:  # Keep using SQL; retry at the next check
+            log(f"Could not build weather data snapshot: {err}",
+                logging.WARNING)
+
+    def select_page(self, station_id: Optional[int] = None,
+                    max_date: Optional[dt.date] = None,
+                    min_date: Optional[dt.date] = None,
+                    page: int = 1, per_page: int = 50) -> Dict[str, Any]:
+        """
+        Get 1 page of weather reports, filtered and paginated the same way
+        as WeatherData.get_page_dict
+        :param station_id: Int uniquely identifying the only WeatherStation
+                           to include reports from, or None to include all
+        :param max_date: datetime.Date after which to exclude reports
+        :param min_date: datetime.Date before which to exclude reports
+        :param page: Int, the page number of results to return
+        :param per_page: Int, number of results per returned page
+        :return: Dict[str, Any] of JSON data mapping "items" to a list of
+                 weather report dicts in the page, plus pagination details
+        """
+        snapshot = self.snapshot
+        per_page = min(per_page, 100)
+        page = max(page, 1)
+        if per_page < 1:
+            per_page = 20
+
+        # Find each station's contiguous run of rows in the date range by
+        # binary search over the (station_id, date) keys
+        stations = (np.array([station_id], dtype=np.int64)
+                    if station_id is not None else snapshot.stations)
+        lo_date = np.datetime64(min_date or "0001-01-01", "D")
+        hi_date = np.datetime64(max_date or "9999-12-31", "D")
+        key = snapshot.arrays["key"]
+        starts = np.searchsorted(key, as_key(stations, lo_date), "left")
+        stops = np.searchsorted(key, as_key(stations, hi_date), "right")
+        run_ends = np.cumsum(stops - starts)
+        total = int(run_ends[-1]) if run_ends.size else 0
+
+        # Map positions in the filtered results to rows in the arrays
+        positions = np.arange((page - 1) * per_page,
+                              min(page * per_page, total))
+        which_run = np.searchsorted(run_ends, positions, "right")
+        rows = starts[which_run] + positions - (run_ends[which_run]
+                                                - (stops - starts)[which_run])
+        return {"page": page, "items": snapshot.to_dicts(rows),
+                "total": total,
+                "next": page + 1 if page * per_page < total else None}
+
+    def get_yearly_stats(self, station_id: Optional[int] = None,
+                         year: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        :param station_id: Int uniquely identifying the only WeatherStation
+                           to include stats from, or None to include all
+        :param year: Int, the only year to include stats from, or None to
+                     include all years
+        :return: List[Dict[str, Any]] of the average minimum and maximum
+                 temperature and total precipitation at each station each
+                 year, formatted the same way as WeatherData.get_yearly_stats
+        """
+        return [stats for stats in self.snapshot.yearly_stats
+                if (station_id is None or stats["station_id"] == station_id)
+                and (year is None or stats["year"] == str(year))]
+
+
+class WeatherSnapshot:
+    """
+    One data version of the weather data DBTable, memory-mapped from a
+    snapshot directory of .npy files. Never modified after loading, except
+    to cache its yearly stats.
+    """
+
+    def __init__(self, snapshot_path: str, version: int) -> None:
+        """
+        :param snapshot_path: String, path to a snapshot directory
+        :param version: Int, the DataVersion that the snapshot was saved at
+        """
+        self.columns: Tuple[str, ...] = tuple(
+            col for col in COLUMNS if os.path.exists(
+                os.path.join(snapshot_path, f"{col}.npy")))
+        self.arrays: Dict[str, np.ndarray] = {
+            col: np.load(os.path.join(snapshot_path, f"{col}.npy"),
+                         mmap_mode="r") for col in (*self.columns, "key")
+        }
+        self.version = version
+
+        # The rows are sorted by station, so each station's run of rows
+        # starts wherever the station ID changes
+        station_ids = self.arrays["station_id"]
+        self.stations: np.ndarray = station_ids[np.flatnonzero(np.diff(
+            station_ids, prepend=-1))].astype(np.int64)
+
+    def to_dicts(self, rows: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        :param rows: numpy.ndarray of ints, indices of rows in the arrays
+        :return: List[Dict[str, Any]] of those rows formatted the same way as
+                 the weather data DBTable's to_dict method
+        """
+        items = list()
+        for values in zip(*[self.arrays[col][rows].tolist()
+                            for col in self.columns]):
+            item = dict(zip(self.columns, values))
+            item["date"] = item["date"].isoformat()
+            for col in NULLABLE_COLUMNS:  # NaN is the only x where x != x
+                if item[col] != item[col]:
+                    item[col] = None
+            if item["precipitation"] is not None:
+                item["precipitation"] = int(item["precipitation"])
+            items.append(item)
+        return items
+
+    @functools.cached_property
+    def yearly_stats(self) -> List[Dict[str, Any]]:
+        """
+        :return: List[Dict[str, Any]] of yearly stats for every station and
+                 year, calculated with vectorized reductions over each
+                 contiguous run of rows from the same station and year
+        """
+        station_ids = self.arrays["station_id"]
+        if not station_ids.size:
+            return list()
+        years = self.arrays["date"].astype("datetime64[Y]").astype(int) + 1970
+        group_key = station_ids.astype(np.int64) * 10000 + years
+        starts = np.flatnonzero(np.diff(group_key, prepend=-1))
+
+        results = {"station_id": station_ids[starts].tolist(),
+                   "year": [str(x) for x in years[starts].tolist()]}
+        for col, label, how in (("min_temp", "avg_min_temp_degC", "avg"),
+                                ("max_temp", "avg_max_temp_degC", "avg"),
+                                ("precipitation", "total_precip_cm", "sum")):
+            values = self.arrays[col]
+            present = ~np.isnan(values)
+            counts = np.add.reduceat(present.astype(np.int64), starts)
+            sums = np.add.reduceat(np.where(present, values, 0), starts)
+            if how == "avg":
+                stats = sums / np.maximum(counts, 1)
+            else:
+                stats = sums.astype(np.int64)
+            results[label] = [None if n == 0 else x for x, n in
+                              zip(stats.tolist(), counts.tolist())]
+        return [dict(zip(results, values))
+                for values in zip(*results.values())]
+
+
+def as_key(station_ids: np.ndarray, dates: np.ndarray) -> np.ndarray:
+    """
+    :param station_ids: numpy.ndarray of ints, WeatherStation ID numbers
+    :param dates: numpy.ndarray of datetime64[D] dates (or a single date)
+    :return: numpy.ndarray of int64 keys which sort by station, then date
+    """
+    return (station_ids.astype(np.int64) * STATION_KEY_SCALE
+            + dates.astype("datetime64[D]").astype(np.int64))
+
+
+# Define basic WeatherStore object for each app process to read from
+weather_store = WeatherStore()
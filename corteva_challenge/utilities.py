@@ -4,14 +4,16 @@
 """
 Greg Conan: gregmconan@gmail.com
 Created: 2024-07-12
-Updated: 2024-07-16
+Updated: 2026-10-19
 """
 # Import standard libraries
-from collections.abc import Callable
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
 import datetime as dt
 import logging
 import requests
-from typing import Any, Mapping, Optional
+import threading
+from typing import Any, List, Mapping, Optional
 
 
 def as_HTTPS_URL(*parts: str) -> str:
@@ -68,6 +70,15 @@ def download_GET(path_URL: str, headers: Mapping[str, Any]) -> Any:
               f"{response.status_code} Error: {response.reason}")
 
 
+def read_text_file(path: str) -> str:
+    """
+    :param path: String, valid path to a local text file
+    :return: String, all text contents of the file at path
+    """
+    with open(path) as infile:
+        return infile.read()
+
+
 # TODO Replace "print()" calls with "log()" calls after making log calls
 #      display in the Debug Console window when running pytest tests
 def log(content: str, level: int = logging.INFO) -> None:
@@ -124,3 +135,40 @@ class ShowTimeTaken:
         """
         self.elapsed = dt.datetime.now() - self.start
         self.show(f"\nTime elapsed {self.doing_what}: {self.elapsed}")
+
+
+class RowCountCache:
+    def __init__(self, max_rows: int) -> None:
+        """
+        Least-recently-used cache of query results which keeps at most
+        max_rows rows in memory in total, however many results hold them
+        :param max_rows: Int, the most rows to keep across all results
+        """
+        self.lock = threading.Lock()
+        self.max_rows = max_rows
+        self.n_rows = 0
+        self.results: OrderedDict[Hashable, List[Any]] = OrderedDict()
+
+    def get(self, key: Hashable, calculate: Callable[[], List[Any]]
+            ) -> List[Any]:
+        """
+        :param key: Hashable uniquely identifying the query
+        :param calculate: Function to run the query if its result is not
+                          cached yet
+        :return: List[Any] of the query's result rows
+        """
+        with self.lock:
+            if key in self.results:
+                self.results.move_to_end(key)
+                return self.results[key]
+        result = calculate()
+        n_rows = max(len(result), 1)  # Count empty results so they expire
+        if n_rows <= self.max_rows:
+            with self.lock:
+                if key not in self.results:
+                    self.results[key] = result
+                    self.n_rows += n_rows
+                while self.n_rows > self.max_rows:
+                    _, oldest = self.results.popitem(last=False)
+                    self.n_rows -= max(len(oldest), 1)
+        return result
@@ -4,25 +4,68 @@
 """
 Greg Conan: gregmconan@gmail.com
 Created: 2024-07-12
-Updated: 2024-07-16
+Updated: 2026-10-19
 """
 # Import standard libraries
 import datetime as dt
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 # PyPI imports
-from flask import Blueprint, jsonify, request
-import sqlalchemy as sa
+from flask import abort, Blueprint, request
 
 # Local custom imports
-from corteva_challenge.models import (CropYield, db, WeatherReport,
+from corteva_challenge.admission import admission
+from corteva_challenge.formats import (ANOMALY_SCHEMA, get_layout,
+                                       get_weather_schema, negotiate,
+                                       OBJECT_TYPES, respond, select_weather,
+                                       TABULAR_TYPES, tabular_response,
+                                       YEARLY_STATS_SCHEMA)
+from corteva_challenge.models import (CropYield, IngestRun, weather_model,
+                                      WeatherNormal, WeatherReport,
                                       WeatherStation)
+from corteva_challenge.replicas import replicas
+from corteva_challenge.store import weather_store
 
 
 bp = Blueprint("weather", __name__, url_prefix="/api")
 
+# Read from a read replica if there are any, and respond 503 right away
+# instead of waiting when its DB connection pool is full
+bp.before_request(replicas.route_reads)
+bp.before_request(admission.shed_if_saturated)
+
+# Parameters to filter weather reports by, mapped to their types
+WEATHER_FILTERS = dict(max_date=dt.date.fromisoformat,
+                       min_date=dt.date.fromisoformat, station_id=int)
+
+# Most selectors, and most weather reports in total, that 1 request to
+# /api/weather/batch can get
+MAX_BATCH_SELECTORS = 100
+MAX_BATCH_ROWS = 100000
+
+# Most groups that 1 request to /api/weather/summary can get statistics of
+MAX_SUMMARY_ROWS = 100000
+
+# Endpoints that read weather reports from weather_model()
+WEATHER_ENDPOINTS = {f"weather.get_weather{suffix}" for suffix in
+                     ("", "_batch", "_stats", "_anomalies", "_summary")}
+
+
+@bp.before_request
+def refuse_stale_weather() -> None:
+    """
+    Respond 503 instead of serving weather reports from weather_report if
+    newer data was ingested into weather_report_compact, because turning on
+    COMPACT_WEATHER_SCHEMA is a one-way switch
+    """
+    if request.endpoint in WEATHER_ENDPOINTS and \
+            weather_model() is WeatherReport and WeatherReport.is_stale():
+        abort(503, "weather_report_compact has newer weather reports than "
+              "weather_report; set COMPACT_WEATHER_SCHEMA=1 to serve them")
+
 
 @bp.get("/weather")
+@admission.guard()
 def get_weather() -> Dict[str, Any]:
     """ Weather report data endpoint
     ---
@@ -49,6 +92,24 @@ def get_weather() -> Dict[str, Any]:
         type: integer
         required: false
         default: 50
+      - name: format
+        in: query
+        type: string
+        enum: [json, msgpack, arrow, parquet]
+        required: false
+        description: Return the page as MessagePack, or every matching report (unpaginated) as an Arrow IPC stream or a Parquet file, instead of JSON; the Accept header can also request application/msgpack, application/vnd.apache.arrow.stream, or application/vnd.apache.parquet
+      - name: layout
+        in: query
+        type: string
+        enum: [rows, columns]
+        required: false
+        default: rows
+        description: Return items as 1 object per report (rows) or as 1 object mapping each field to a list of its values (columns)
+    produces:
+      - application/json
+      - application/msgpack
+      - application/vnd.apache.arrow.stream
+      - application/vnd.apache.parquet
     definitions:
         WeatherReport:
             type: object
@@ -84,45 +145,322 @@ def get_weather() -> Dict[str, Any]:
                 type: 'array'
                 items:
                     $ref: '#/definitions/WeatherReport'
+        503:
+            description: Too many Arrow or Parquet downloads at once, no free DB connections, or a query that took too long; retry after the number of seconds in the Retry-After header
     """
-    return WeatherReport.get_pagination_JSON(
-        request.args, max_date=dt.date.fromisoformat,
-        min_date=dt.date.fromisoformat, station_id=int
-    )
+    model = weather_model()
+    content_type = negotiate(request)
+    if content_type in TABULAR_TYPES:  # Stream all filtered rows
+        which = {name: request.args.get(name, type=field_type)
+                 for name, field_type in WEATHER_FILTERS.items()}
+        return tabular_response(select_weather(model, **which),
+                                get_weather_schema(model), content_type,
+                                "weather", "weather")
+
+    if weather_store.is_fresh():
+        page = weather_store.select_page(
+            **model.get_page_params(request.args, **WEATHER_FILTERS))
+    else:
+        page = model.get_page_dict(request.args, **WEATHER_FILTERS)
+    return respond(page, content_type, get_layout(request))
+
+
+@bp.post("/weather/batch")
+@admission.guard()
+def get_weather_batch() -> Dict[str, Any]:
+    """ Weather report data endpoint for many stations/date ranges at once
+    ---
+    parameters:
+      - name: selectors
+        in: body
+        required: true
+        description: Reports to get, from 1 station each, between 2 optional dates (inclusive)
+        schema:
+            type: array
+            maxItems: 100
+            items:
+                type: object
+                required: [station_id]
+                properties:
+                    station_id:
+                        type: integer
+                        example: 3
+                    min_date:
+                        type: string
+                        format: date
+                        example: '1998-01-01'
+                    max_date:
+                        type: string
+                        format: date
+                        example: '1998-03-31'
+    produces:
+      - application/json
+      - application/msgpack
+    responses:
+        200:
+            description: For each selector, in order, the selector itself, how many reports matched it, and every matching report in date order
+        400:
+            description: Invalid selectors, or more than 100,000 matching reports in total
+        503:
+            description: Too many requests to this endpoint at once, no free DB connections, or a query that took too long; retry after the number of seconds in the Retry-After header
+    """
+    content_type = negotiate(request, OBJECT_TYPES)
+    selectors = [get_batch_selector(selector)
+                 for selector in get_batch_selectors()]
+    reports = admission.run("batch", lambda: weather_model().get_batch(
+        selectors, MAX_BATCH_ROWS + 1))
+    if sum(len(each) for each in reports) > MAX_BATCH_ROWS:
+        abort(400, f"Selectors match over {MAX_BATCH_ROWS} reports in total")
+    return respond({"results": [
+        {**{k: str(v) if isinstance(v, dt.date) else v
+            for k, v in selector.items()},
+         "total": len(items), "items": items}
+        for selector, items in zip(selectors, reports)
+    ]}, content_type)
+
+
+def get_batch_selectors() -> List[Any]:
+    """
+    :return: List[Any], the JSON array of selectors in the request body
+    """
+    selectors = request.get_json(silent=True)
+    if not isinstance(selectors, list) or not selectors:
+        abort(400, "Request body must be a JSON array of selectors")
+    if len(selectors) > MAX_BATCH_SELECTORS:
+        abort(400, f"Request at most {MAX_BATCH_SELECTORS} selectors at once")
+    return selectors
+
+
+def get_batch_selector(selector: Any) -> Dict[str, Any]:
+    """
+    :param selector: Object from the JSON array in the request body
+    :return: Dict[str, Any] mapping each WEATHER_FILTERS parameter in
+             selector to its value, converted into the right type
+    """
+    if not isinstance(selector, dict) or selector.get("station_id") is None:
+        abort(400, "Each selector must be an object with a station_id")
+    try:
+        # Reject JSON true, 1.9, and "7" instead of converting them to ints
+        if type(selector["station_id"]) is not int:
+            raise TypeError(selector["station_id"])
+        return {name: to_type(selector[name])
+                for name, to_type in WEATHER_FILTERS.items()
+                if selector.get(name) is not None}
+    except (TypeError, ValueError):
+        abort(400, "Each selector needs an integer station_id, and any "
+                   "min_date or max_date must be in YYYY-MM-DD format")
 
 
 @bp.get("/weather/stats")
+@admission.guard()
 def get_weather_stats() -> dict[str, object]:
     """ Weather statistics endpoint
     ---
+    parameters:
+      - name: station_id
+        in: query
+        type: integer
+        required: false
+      - name: year
+        in: query
+        type: integer
+        required: false
+      - name: format
+        in: query
+        type: string
+        enum: [json, msgpack, arrow, parquet]
+        required: false
+        description: Return stats as MessagePack, an Arrow IPC stream, or a Parquet file instead of JSON; the Accept header can also request any of them
+      - name: layout
+        in: query
+        type: string
+        enum: [rows, columns]
+        required: false
+        default: rows
+        description: Return 1 object per station-year (rows) or 1 object mapping each field to a list of its values (columns)
+    produces:
+      - application/json
+      - application/msgpack
+      - application/vnd.apache.arrow.stream
+      - application/vnd.apache.parquet
     responses:
         200:
             description: Weather summary statistics - total precipitation and average maximum and minimum temperature
+        503:
+            description: Too many requests to this endpoint at once, no free DB connections, or a query that took too long; retry after the number of seconds in the Retry-After header
     """
-    # TODO Modularize; move code below into DBTable/WeatherReport method(s)
+    # Only include the specific year(s) and weather station(s) requested
+    which = {filter_param: request.args.get(filter_param, type=int)
+             for filter_param in ("year", "station_id")}
 
-    # Build SQLAlchemy query to get overall yearly weather stats
-    all_stats = dict()
-    year = sa.extract("year", WeatherReport.date).label("year")
-    query = db.select(
-        WeatherReport.station_id, year,
-        sa.func.avg(WeatherReport.min_temp).label("avg_min_temp_degC"),
-        sa.func.avg(WeatherReport.max_temp).label("avg_max_temp_degC"),
-        sa.func.sum(WeatherReport.precipitation).label("total_precip_cm")
-    ).group_by(WeatherReport.station_id, year)
+    model = weather_model()
+    content_type = negotiate(request)
+    if content_type in TABULAR_TYPES:
+        return tabular_response(model.select_yearly_stats(**which),
+                                YEARLY_STATS_SCHEMA, content_type,
+                                "weather_stats", "stats")
 
-    # Only include the specific year(s) and weather station(s) requested
-    which = dict()
-    for filter_param in ("year", "station_id", "page", "per_page"):
-        which[filter_param] = request.args.get(filter_param, type=int)
-    if which.get("year") is not None:
-        query.filter_by(year=which.get("year"))
-    if which.get("station_id") is not None:
-        query.filter_by(station_id=which.get("station_id"))
+    # Get yearly weather stats for the station(s) from memory if possible,
+    # or else query them once for every identical request arriving at once
+    if weather_store.is_fresh():
+        stats = weather_store.get_yearly_stats(**which)
+    else:
+        stats = admission.run("stats", lambda: model.get_yearly_stats(
+            **which), key=(model.__tablename__, *which.items()))
+    return respond(stats, content_type, get_layout(request))
+
+
+@bp.get("/weather/anomalies")
+@admission.guard()
+def get_weather_anomalies() -> Dict[str, Any]:
+    """ Weather anomalies endpoint: daily reports compared to normal
+    ---
+    parameters:
+      - name: station_id
+        in: query
+        type: integer
+        required: true
+      - name: min_date
+        in: query
+        type: string
+        required: false
+      - name: max_date
+        in: query
+        type: string
+        required: false
+      - name: format
+        in: query
+        type: string
+        enum: [json, msgpack, arrow, parquet]
+        required: false
+        description: Return anomalies as MessagePack, an Arrow IPC stream, or a Parquet file instead of JSON; the Accept header can also request any of them
+      - name: layout
+        in: query
+        type: string
+        enum: [rows, columns]
+        required: false
+        default: rows
+    produces:
+      - application/json
+      - application/msgpack
+      - application/vnd.apache.arrow.stream
+      - application/vnd.apache.parquet
+    responses:
+        200:
+            description: Each daily report from the station in date order, with the station's normal (mean across all years) for that calendar day, the difference from normal (anomaly), and for temperatures, that difference in standard deviations (zscore)
+        400:
+            description: No station_id
+        503:
+            description: Too many requests to this endpoint at once, no free DB connections, or a query that took too long; retry after the number of seconds in the Retry-After header
+    """
+    which = {name: request.args.get(name, type=field_type)
+             for name, field_type in WEATHER_FILTERS.items()}
+    if which["station_id"] is None:
+        abort(400, "station_id is required")
+
+    model = weather_model()
+    content_type = negotiate(request)
+    if content_type in TABULAR_TYPES:
+        return tabular_response(WeatherNormal.select_anomalies(
+            model, **which), ANOMALY_SCHEMA, content_type,
+            "weather_anomalies", "anomalies")
+    anomalies = admission.run(
+        "anomalies", lambda: WeatherNormal.get_anomalies(model, **which),
+        key=(model.__tablename__, *which.items()))
+    return respond(anomalies, content_type, get_layout(request))
+
+
+@bp.get("/weather/summary")
+@admission.guard()
+def get_weather_summary() -> Dict[str, Any]:
+    """ Weather summary statistics endpoint for any columns and groups
+    ---
+    parameters:
+      - name: cols
+        in: query
+        type: string
+        required: false
+        default: max_temp,min_temp,precipitation
+        description: Comma-separated columns to summarize
+      - name: stats
+        in: query
+        type: string
+        required: false
+        default: min,max,avg
+        description: Comma-separated statistics to calculate for each column; any of avg, max, min, stddev, sum, or pN for the Nth percentile (e.g. p50,p95)
+      - name: group
+        in: query
+        type: string
+        required: false
+        description: Comma-separated groups to calculate statistics separately for; any of station, year, month. Groups are sorted by station, then year, then month, in any order given. By default, summarize all reports together
+      - name: station_id
+        in: query
+        type: integer
+        required: false
+      - name: min_date
+        in: query
+        type: string
+        required: false
+      - name: max_date
+        in: query
+        type: string
+        required: false
+      - name: format
+        in: query
+        type: string
+        enum: [json, msgpack]
+        required: false
+      - name: layout
+        in: query
+        type: string
+        enum: [rows, columns]
+        required: false
+        default: rows
+    produces:
+      - application/json
+      - application/msgpack
+    responses:
+        200:
+            description: Each group and its statistics, named column_stat (e.g. max_temp_p95)
+        400:
+            description: Invalid column, statistic, or group name, or more than 100000 groups
+        503:
+            description: Too many requests to this endpoint at once, no free DB connections, or a query that took too long; retry after the number of seconds in the Retry-After header
+    """
+    model = weather_model()
+    content_type = negotiate(request, OBJECT_TYPES)
+    cols = get_list_param("cols", model.SUMMARY_COLS, model.SUMMARY_COLS)
+    stats = get_list_param("stats", ("min", "max", "avg"))
+    if not all(model.get_summary_fn(stat) for stat in stats):
+        abort(400, "stats must each be one of "
+                   f"{', '.join(model.SUMMARY_STATS)}, or pN (e.g. p95)")
+    groups = get_list_param("group", (), model.SUMMARY_GROUPS)
+    which = {name: request.args.get(name, type=field_type)
+             for name, field_type in WEATHER_FILTERS.items()}
+    summary = admission.run(
+        "summary", lambda: model.get_summary(
+            cols, stats, groups, MAX_SUMMARY_ROWS + 1, **which),
+        key=(model.__tablename__, frozenset(cols), frozenset(stats),
+             frozenset(groups), *which.items()))
+    if len(summary) > MAX_SUMMARY_ROWS:
+        abort(400, f"Over {MAX_SUMMARY_ROWS} groups match; filter by "
+                   "station_id, min_date, or max_date, or use fewer groups")
+    return respond(summary, content_type, get_layout(request))
 
-    # Execute and return query to get yearly weather stats for the station(s)
-    all_stats = [row._asdict() for row in db.session.execute(query)]
-    return jsonify(all_stats)
+
+def get_list_param(name: str, default: Tuple[str, ...],
+                   valid: Optional[Iterable[str]] = None) -> Tuple[str, ...]:
+    """
+    :param name: String naming a URL parameter of comma-separated values
+    :param default: Tuple[str, ...] of values to use if there are none
+    :param valid: Iterable[str] of all valid values, or None to allow any
+    :return: Tuple[str, ...] of the unique values in the URL parameter
+    """
+    values = tuple(dict.fromkeys(value.strip() for value in request.args.get(
+        name, default="").split(",") if value.strip())) or default
+    if valid is not None and not set(values).issubset(valid):
+        abort(400, f"{name} must each be one of {', '.join(valid)}")
+    return values
 
 
 @bp.get("/weather/stations")
@@ -140,6 +478,20 @@ def get_weather_stations() -> Dict[str, Any]:
         type: integer
         required: false
         default: 50
+      - name: format
+        in: query
+        type: string
+        enum: [json, msgpack]
+        required: false
+      - name: layout
+        in: query
+        type: string
+        enum: [rows, columns]
+        required: false
+        default: rows
+    produces:
+      - application/json
+      - application/msgpack
     definitions:
         WeatherStation:
             type: object
@@ -160,7 +512,8 @@ def get_weather_stations() -> Dict[str, Any]:
         200:
             description: List the name, update/creation date, and ID number of each weather station
     """
-    return WeatherStation.get_pagination_JSON(request.args)
+    return respond(WeatherStation.get_page_dict(request.args),
+                   negotiate(request, OBJECT_TYPES), get_layout(request))
 
 
 @bp.get("/crop")
@@ -178,6 +531,20 @@ def get_crop_yield() -> Dict[str, Any]:
         type: integer
         required: false
         default: 50
+      - name: format
+        in: query
+        type: string
+        enum: [json, msgpack]
+        required: false
+      - name: layout
+        in: query
+        type: string
+        enum: [rows, columns]
+        required: false
+        default: rows
+    produces:
+      - application/json
+      - application/msgpack
     definitions:
         CropYield:
             type: object
@@ -202,4 +569,71 @@ def get_crop_yield() -> Dict[str, Any]:
         200:
             description: Number of corn bushels per year, plus crop yield record ID and creation date
     """
-    return CropYield.get_pagination_JSON(request.args)
+    return respond(CropYield.get_page_dict(request.args),
+                   negotiate(request, OBJECT_TYPES), get_layout(request))
+
+
+@bp.get("/ingest")
+def get_ingest_runs() -> Dict[str, Any]:
+    """ Data ingest log endpoint
+    ---
+    parameters:
+      - name: page
+        in: query
+        type: integer
+        required: false
+        default: 1
+      - name: per_page
+        in: query
+        type: integer
+        required: false
+        default: 50
+      - name: format
+        in: query
+        type: string
+        enum: [json, msgpack]
+        required: false
+      - name: layout
+        in: query
+        type: string
+        enum: [rows, columns]
+        required: false
+        default: rows
+    produces:
+      - application/json
+      - application/msgpack
+    definitions:
+        IngestRun:
+            type: object
+            properties:
+                created:
+                    type: string
+                    format: date
+                duration_seconds:
+                    type: number
+                    format: float
+                error:
+                    type: string
+                finished:
+                    type: string
+                    format: date
+                host:
+                    type: string
+                id:
+                    type: integer
+                    format: int32
+                status:
+                    type: string
+                    example: succeeded
+                weather_rows:
+                    type: integer
+                    format: int32
+                yield_rows:
+                    type: integer
+                    format: int32
+    responses:
+        200:
+            description: When each data ingest ran (newest first), on which host, how long it took, and how many rows it loaded
+    """
+    return respond(IngestRun.get_page_dict(request.args),
+                   negotiate(request, OBJECT_TYPES), get_layout(request))
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Greg Conan: gregmconan@gmail.com
+Created: 2026-10-19
+Updated: 2026-10-19
+"""
+# Import standard libraries
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+# PyPI imports
+from flask import Flask
+import pytest
+import sqlalchemy as sa
+from werkzeug.exceptions import ServiceUnavailable
+
+# Local custom imports
+from corteva_challenge.admission import admission
+from corteva_challenge.models import db, weather_model
+
+
+def test_coalesce_identical_queries() -> None:
+    calls = list()
+
+    def slow_query():
+        calls.append(1)
+        time.sleep(0.2)
+        return [{"year": 1998}]
+
+    # WHEN: Many threads make the same query at once
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: admission.coalesce(
+            ("test", 1998), slow_query), range(8)))
+
+    # THEN: It only runs once, and every thread gets its result
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert not admission.flights
+
+
+def test_coalesce_shares_errors() -> None:
+    started = threading.Event()
+
+    def fail():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError("Bad query")
+
+    # WHEN: A query fails while another thread is waiting for it
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(admission.coalesce, "fails", fail)
+        started.wait()
+        waiter = pool.submit(admission.coalesce, "fails", fail)
+
+    # THEN: Both threads get its error, and the next call tries again
+    for future in (leader, waiter):
+        with pytest.raises(ValueError):
+            future.result()
+    assert admission.coalesce("fails", lambda: 1) == 1
+
+
+def test_endpoint_limit(client, monkeypatch) -> None:
+    monkeypatch.setattr(admission, "wait_seconds", 0.01)
+
+    # GIVEN: Every slot for the stats endpoint is taken
+    slot = admission.get_slot("stats")
+    taken = 0
+    while slot.acquire(blocking=False):
+        taken += 1
+
+    # WHEN: Another request to it arrives
+    try:
+        response = client.get("/api/weather/stats")
+    finally:
+        for _ in range(taken):
+            slot.release()
+
+    # THEN: It is turned away, but other endpoints still respond
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(admission.retry_after)
+    assert client.get("/api/crop").status_code == 200
+    assert client.get("/api/weather/stats").status_code == 200
+
+
+def count_free_slots(endpoint: str) -> int:
+    """
+    :param endpoint: String naming the endpoint whose slots to count
+    :return: Int, the number of the endpoint's slots that no request holds
+    """
+    slot = admission.get_slot(endpoint)
+    n_free = 0
+    while slot.acquire(blocking=False):
+        n_free += 1
+    for _ in range(n_free):
+        slot.release()
+    return n_free
+
+
+@pytest.mark.parametrize("endpoint", ("/api/weather?format=arrow",
+                                      "/api/weather/stats?format=parquet"))
+def test_tabular_endpoint_limit(client, monkeypatch, endpoint: str) -> None:
+    monkeypatch.setattr(admission, "wait_seconds", 0.01)
+    slot_name = "stats" if "stats" in endpoint else "weather"
+    slot = admission.get_slot(slot_name)
+    taken = count_free_slots(slot_name)
+
+    # GIVEN: Every slot for the endpoint is taken
+    for _ in range(taken):
+        slot.acquire()
+
+    # WHEN: A streamed download from it is requested
+    try:
+        response = client.get(endpoint)
+    finally:
+        for _ in range(taken):
+            slot.release()
+
+    # THEN: It is turned away before streaming anything
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+
+    # THEN: Once a slot is free, it streams, then frees the slot again
+    response = client.get(endpoint)
+    assert response.status_code == 200 and response.data
+    response.close()
+    assert count_free_slots(slot_name) == taken
+
+
+def test_tabular_statement_timeout(client, monkeypatch) -> None:
+    # GIVEN: A query which takes longer than its timeout to return any rows
+    monkeypatch.setattr(admission, "statement_timeout_ms", 50)
+    monkeypatch.setattr(weather_model(), "select_yearly_stats",
+                        lambda **which: sa.select(sa.func.pg_sleep(1)))
+
+    # WHEN: A streamed download's query is cancelled
+    response = client.get("/api/weather/stats?format=arrow")
+
+    # THEN: The app responds 503 instead of a truncated 200
+    assert response.status_code == 503
+    assert count_free_slots("stats") == admission.max_concurrent
+
+
+def test_shed_when_pool_is_full(client, monkeypatch) -> None:
+    # GIVEN: The DB connection pool has no free connections
+    monkeypatch.setattr(admission, "max_connections", 0)
+
+    # THEN: API requests are turned away right away instead of waiting
+    response = client.get("/api/crop")
+    assert response.status_code == 503 and "Retry-After" in response.headers
+
+
+def test_statement_timeout(app: Flask) -> None:
+    @admission.guard(statement_timeout_ms=50)
+    def slow_view():
+        return admission.run("slow", lambda: db.session.execute(
+            sa.text("SELECT pg_sleep(1)")).all())
+
+    # WHEN: An expensive endpoint's query takes longer than its timeout
+    with app.app_context(), app.test_request_context("/api/slow"):
+        started = time.monotonic()
+        with pytest.raises(ServiceUnavailable):
+            slow_view()
+
+        # THEN: PostgreSQL cancels it, and the app responds 503
+        assert time.monotonic() - started < 1
+        db.session.remove()
+
+    # THEN: Other requests' queries have no timeout
+    with app.app_context(), app.test_request_context("/api/crop"):
+        assert db.session.execute(sa.text("SHOW statement_timeout")
+                                  ).scalar() == "0"
+        db.session.remove()
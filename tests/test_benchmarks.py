@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Greg Conan: gregmconan@gmail.com
+Created: 2026-10-19
+Updated: 2026-10-19
+"""
+# Import standard libraries
+import csv
+import os
+
+# Local custom imports
+from benchmarks.synthetic import generate, WX_FIELD_WIDTH, YIELD_FILE_NAME
+from corteva_challenge.ingest import DAILY_WEATHER_SUBDIR, YEARLY_YIELD_SUBDIR
+from corteva_challenge.models import LocalDataDir, WeatherReport
+
+
+def test_synthetic_data_is_deterministic(tmp_path) -> None:
+    # GIVEN: Two synthetic datasets generated with the same parameters
+    manifests = [generate(str(tmp_path / name), n_stations=3, n_years=2)
+                 for name in ("a", "b")]
+
+    # THEN: Both datasets are identical, byte for byte
+    assert manifests[0] == manifests[1]
+    for subdir in (DAILY_WEATHER_SUBDIR, YEARLY_YIELD_SUBDIR):
+        for fname in os.listdir(tmp_path / "a" / subdir):
+            assert ((tmp_path / "a" / subdir / fname).read_bytes() ==
+                    (tmp_path / "b" / subdir / fname).read_bytes())
+
+
+def test_synthetic_data_matches_source_format(tmp_path) -> None:
+    # GIVEN: A synthetic dataset
+    manifest = generate(str(tmp_path), n_stations=2, n_years=3)
+
+    # WHEN: Reading it the same way that the ingest functions do
+    data_dir = LocalDataDir(str(tmp_path), [DAILY_WEATHER_SUBDIR,
+                                            YEARLY_YIELD_SUBDIR])
+    reports = list()
+    for each_file in data_dir.files_in[DAILY_WEATHER_SUBDIR]:
+        tsv_contents = each_file.download_and_read()
+
+        # THEN: Each value is right-aligned to a fixed width like the source
+        assert all(len(value) == WX_FIELD_WIDTH
+                   for line in tsv_contents.splitlines()
+                   for value in line.split("\t")[1:])
+        reader = csv.DictReader(tsv_contents.split("\n"),
+                                delimiter="\t", lineterminator="\n",
+                                fieldnames=WeatherReport.FIELDS)
+        reports += [WeatherReport.convert_data_in(row, 1) for row in reader]
+
+    # THEN: Every row is a valid report, and there is 1 yield file
+    assert len(reports) == manifest["weather_rows"]
+    assert [f.name for f in data_dir.files_in[YEARLY_YIELD_SUBDIR]] == [
+        YIELD_FILE_NAME
+    ]
@@ -4,16 +4,88 @@
 """
 Greg Conan: gregmconan@gmail.com
 Created: 2024-07-14
-Updated: 2024-07-16
+Updated: 2026-10-19
 """
 # PyPI imports
 from flask import Flask
 
 # Local custom imports
-from corteva_challenge.ingest import ingest
+from corteva_challenge.ingest import (DAILY_WEATHER_SUBDIR, ingest,
+                                      ingest_local, YEARLY_YIELD_SUBDIR)
+from corteva_challenge.models import (DataVersion, db, LocalDataFile,
+                                      weather_model, WeatherNormal,
+                                      WeatherStation)
 from corteva_challenge.utilities import ShowTimeTaken
 
 
 def test_ingest(app: Flask) -> None:
     with ShowTimeTaken("testing the 'ingest' function"):
         ingest(app.config["GITHUB_TOKEN"], max_files=10)
+
+
+def test_reingest_counts_changes(app: Flask, tmp_path) -> None:
+    # GIVEN: A weather station data file
+    station_file = tmp_path / "TESTSTN0.txt"
+    rows = ["19850101\t-22\t-128\t94", "19850102\t-122\t-217\t0",
+            "19850103\t-9999\t-9999\t-9999"]
+    station_file.write_text("\n".join(rows) + "\n")
+    model = weather_model()
+    try:
+        # WHEN: It is loaded 3 times, changing 1 row before the last time
+        first = WeatherStation.load_reports_from(
+            LocalDataFile(station_file.name, str(station_file)))
+        version = DataVersion.get(model.__tablename__)
+        second = WeatherStation.load_reports_from(
+            LocalDataFile(station_file.name, str(station_file)))
+        unchanged_version = DataVersion.get(model.__tablename__)
+        rows[2] = "19850103\t-9999\t-9999\t5"
+        station_file.write_text("\n".join(rows) + "\n")
+        third = WeatherStation.load_reports_from(
+            LocalDataFile(station_file.name, str(station_file)))
+
+        # THEN: Only new or changed rows are written, and only writing any
+        #       rows changes the data version
+        assert first == {"inserted": 3, "updated": 0, "unchanged": 0}
+        assert second == {"inserted": 0, "updated": 0, "unchanged": 3}
+        assert third == {"inserted": 0, "updated": 1, "unchanged": 2}
+        assert unchanged_version == version
+        assert DataVersion.get(model.__tablename__) == version + 1
+    finally:
+        station = WeatherStation.query.filter_by(
+            station_name="TESTSTN0").one_or_none()
+        if station is not None:
+            for table in (model, WeatherNormal):
+                db.session.execute(db.delete(table).filter_by(
+                    station_id=station.id))
+            db.session.delete(station)
+        db.session.commit()
+
+
+def test_missing_normals_table_is_created(app: Flask, tmp_path) -> None:
+    # GIVEN: A DB set up before the weather_normal DBTable existed
+    db.session.commit()
+    WeatherNormal.__table__.drop(db.engine, checkfirst=True)
+    for subdir in (DAILY_WEATHER_SUBDIR, YEARLY_YIELD_SUBDIR):
+        (tmp_path / subdir).mkdir()
+    (tmp_path / DAILY_WEATHER_SUBDIR / "TESTSTN2.txt").write_text(
+        "19850101\t-22\t-128\t94\n19850102\t-122\t-217\t0\n")
+    model = weather_model()
+    try:
+        # WHEN: Data is ingested into it
+        counts = ingest_local(str(tmp_path))
+
+        # THEN: The weather_normal DBTable is created and filled
+        station = WeatherStation.query.filter_by(
+            station_name="TESTSTN2").one()
+        assert counts["weather_rows"] == 2
+        assert WeatherNormal.query.filter_by(
+            station_id=station.id).count() == 2
+    finally:
+        station = WeatherStation.query.filter_by(
+            station_name="TESTSTN2").one_or_none()
+        if station is not None:
+            for table in (model, WeatherNormal):
+                db.session.execute(db.delete(table).filter_by(
+                    station_id=station.id))
+            db.session.delete(station)
+        db.session.commit()
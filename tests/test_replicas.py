@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Greg Conan: gregmconan@gmail.com
+Created: 2026-10-19
+Updated: 2026-10-19
+"""
+# Import standard libraries
+import importlib
+import os
+import time
+
+# PyPI imports
+from flask import Flask, g
+import pytest
+import sqlalchemy as sa
+
+# Local custom imports
+from corteva_challenge import config, create_Flask_app
+from corteva_challenge.models import CropYield, DataVersion, db
+from corteva_challenge.replicas import replicas
+
+# Read replica to test with, e.g. a streaming replica of the primary DB on
+# another local PostgreSQL instance; without one, the primary stands in
+REPLICA_URI = os.getenv("TEST_READ_REPLICA_URI",
+                        config.SQLALCHEMY_DATABASE_URI)
+
+# URI of a DB which is never running, to stand in for a replica that is down
+DOWN_URI = "postgresql+psycopg2://postgres@127.0.0.1:1/corteva"
+
+
+@pytest.fixture()
+def make_app(monkeypatch):
+    """ Fixture to create flask apps with read replicas from the factory;
+    after the first check, the replicas are only checked when tests call
+    replicas.check()
+    """
+    def make(*replica_uris: str, **settings: str) -> Flask:
+        monkeypatch.setenv("READ_REPLICA_URIS", ",".join(replica_uris))
+        monkeypatch.setenv("REPLICA_CHECK_SECONDS", "3600")
+        for name, value in settings.items():
+            monkeypatch.setenv(name, value)
+        app = create_Flask_app()
+        app.config.update({"TESTING": True})
+        return app
+    yield make
+
+    # Stop routing to the replicas, and forget them, for later tests
+    if replicas.checker is not None:
+        replicas.checker.join()
+    monkeypatch.undo()
+    create_Flask_app()
+    for key in [key for key in db.metadatas if key is not None]:
+        del db.metadatas[key]
+
+
+def test_round_robin_skips_down_replica(make_app) -> None:
+    # GIVEN: 2 working read replicas and 1 which is down
+    app = make_app(REPLICA_URI, DOWN_URI, REPLICA_URI)
+    with app.test_request_context("/api/crop"):
+        engines = db.engines
+
+        # WHEN: Requests choose which DB to read from
+        replicas.check()
+        chosen = list()
+        for _ in range(4):
+            replicas.route_reads()
+            chosen.append(g.read_engine)
+
+        # THEN: They take turns between the working replicas
+        assert chosen == [engines["replica_0"], engines["replica_2"]] * 2
+
+        # THEN: Only SELECT statements go to the replica
+        select, insert = sa.select(CropYield), sa.insert(CropYield)
+        assert db.session.get_bind(clause=select) is g.read_engine
+        assert db.session.get_bind(clause=insert) is db.engine
+        if "TEST_READ_REPLICA_URI" in os.environ:
+            assert db.session.execute(sa.select(
+                sa.func.pg_is_in_recovery())).scalar()
+        db.session.remove()
+
+    assert app.test_client().get("/api/crop").status_code == 200
+
+
+def test_no_working_replica_reads_primary(make_app) -> None:
+    with make_app(DOWN_URI).test_request_context("/api/crop"):
+        replicas.check()
+        replicas.route_reads()
+        assert g.read_engine is None
+        assert db.session.get_bind(clause=sa.select(CropYield)) is db.engine
+
+
+@pytest.mark.parametrize("read_your_writes", ("1", "0"))
+def test_lagging_replica(make_app, monkeypatch, read_your_writes) -> None:
+    # GIVEN: A replica which has not yet replayed the primary's last ingest
+    def get_versions(engine, name):
+        return {"weather_report": 1 if name == "primary" else 0}
+    monkeypatch.setattr(importlib.import_module("corteva_challenge.replicas"),
+                        "get_versions", get_versions)
+    app = make_app(REPLICA_URI, REPLICA_READ_YOUR_WRITES=read_your_writes)
+
+    # WHEN: A request chooses which DB to read from
+    with app.test_request_context("/api/crop"):
+        replicas.check()
+        replicas.route_reads()
+
+        # THEN: It reads from the primary until the replica catches up,
+        #       unless read-your-writes is off
+        assert (g.read_engine is None) == (read_your_writes == "1")
+
+
+def test_slow_check_does_not_block(make_app, monkeypatch) -> None:
+    # GIVEN: A replica which takes a long time to check
+    checked = list()
+
+    def get_versions(engine, name):
+        if name != "primary":
+            checked.append(name)
+            time.sleep(1)
+        return dict()
+    monkeypatch.setattr(importlib.import_module("corteva_challenge.replicas"),
+                        "get_versions", get_versions)
+    app = make_app(REPLICA_URI)
+
+    with app.test_request_context("/api/crop"):
+        # WHEN: Requests arrive before the first check of it finishes
+        started = time.monotonic()
+        chosen = list()
+        for _ in range(2):
+            replicas.route_reads()
+            chosen.append(g.read_engine)
+
+        # THEN: They read from the primary right away instead of waiting
+        assert chosen == [None, None]
+        assert time.monotonic() - started < 0.5
+
+        # THEN: Once the 1 background check finishes, requests read from
+        #       the replica
+        replicas.checker.join()
+        replicas.route_reads()
+        assert g.read_engine is db.engines["replica_0"]
+        assert checked == ["replica_0"]
+
+
+@pytest.mark.skipif("TEST_READ_REPLICA_URI" not in os.environ,
+                    reason="Needs a streaming replica of the primary DB")
+def test_read_your_writes(make_app) -> None:
+    app = make_app(os.environ["TEST_READ_REPLICA_URI"])
+    with app.app_context():
+        replica = db.engines["replica_0"]
+        with replica.connect() as conn:
+            conn.execute(sa.text("SELECT pg_wal_replay_pause()"))
+        try:
+            # GIVEN: An ingest changed data that the replica has not replayed
+            DataVersion.bump("test_replica")
+            db.session.commit()
+
+            # THEN: Requests read from the primary
+            with app.test_request_context("/api/crop"):
+                replicas.check()
+                replicas.route_reads()
+                assert g.read_engine is None
+        finally:
+            with replica.connect() as conn:
+                conn.execute(sa.text("SELECT pg_wal_replay_resume()"))
+
+        # THEN: Once it catches up, requests read from the replica again
+        for _ in range(50):
+            with app.test_request_context("/api/crop"):
+                replicas.check()
+                replicas.route_reads()
+                if g.read_engine is replica:
+                    break
+            time.sleep(0.1)
+        assert g.read_engine is replica
+        db.session.execute(sa.delete(DataVersion).filter_by(
+            table_name="test_replica"))
+        db.session.commit()
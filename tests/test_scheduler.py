@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Greg Conan: gregmconan@gmail.com
+Created: 2026-10-19
+Updated: 2026-10-19
+"""
+# PyPI imports
+from flask import Flask
+import pytest
+import sqlalchemy as sa
+
+# Local custom imports
+from corteva_challenge.models import db, IngestRun
+from corteva_challenge.scheduler import (INGEST_LOCK_KEY, run_ingest_once,
+                                         run_scheduler)
+
+# Row counts for fake ingests to return without touching any data
+ROW_COUNTS = {"weather_rows": 3, "yield_rows": 1}
+
+
+@pytest.fixture()
+def ingest_runs(app: Flask):
+    """ Fixture to create the ingest_run DBTable, count fake ingests, and
+    then delete the ingest_run rows that they logged
+    """
+    IngestRun.create_table()
+    last_id = db.session.scalar(sa.select(sa.func.max(IngestRun.id))) or 0
+    db.session.rollback()  # Do not block tests that alter ingest_run
+    calls = list()
+    yield calls
+    db.session.rollback()
+    db.session.execute(sa.delete(IngestRun).where(IngestRun.id > last_id))
+    db.session.commit()
+
+
+def test_ingest_is_logged(ingest_runs) -> None:
+    # WHEN: An ingest runs while no other instance is ingesting
+    run = run_ingest_once(lambda: ingest_runs.append(1) or ROW_COUNTS)
+
+    # THEN: Its duration and row counts are saved
+    assert ingest_runs == [1]
+    assert run.status == "succeeded"
+    assert run.duration_seconds >= 0
+    assert (run.weather_rows, run.yield_rows) == (3, 1)
+    assert run.to_dict()["finished"] is not None
+
+
+def test_old_ingest_table_gets_new_columns(ingest_runs) -> None:
+    # GIVEN: An ingest_run DBTable created before unchanged_rows existed
+    with db.engine.begin() as conn:
+        conn.execute(sa.text("ALTER TABLE ingest_run "
+                             "DROP COLUMN unchanged_rows"))
+
+    # WHEN: The ingest_run DBTable is created again
+    IngestRun.create_table()
+
+    # THEN: It has the new column, so ingests can record unchanged rows
+    run = run_ingest_once(lambda: dict(ROW_COUNTS, unchanged_rows=5))
+    assert run.unchanged_rows == 5
+
+
+def test_ingest_waits_for_lock(ingest_runs) -> None:
+    # GIVEN: Another instance holds the ingest lock
+    with db.engine.connect() as other_instance:
+        other_instance.execute(sa.text("SELECT pg_advisory_lock(:key)"),
+                               {"key": INGEST_LOCK_KEY})
+
+        # WHEN: This instance tries to ingest
+        run = run_ingest_once(lambda: ingest_runs.append(1) or ROW_COUNTS)
+
+        # THEN: It skips ingesting
+        assert run is None and not ingest_runs
+        other_instance.execute(sa.text("SELECT pg_advisory_unlock(:key)"),
+                               {"key": INGEST_LOCK_KEY})
+
+    # THEN: Once the lock is free, it can ingest
+    assert run_ingest_once(lambda: ROW_COUNTS) is not None
+
+
+def test_failed_ingest_releases_lock(ingest_runs) -> None:
+    def fail():
+        raise ValueError("Bad data file")
+
+    # WHEN: An ingest fails
+    with pytest.raises(ValueError):
+        run_ingest_once(fail)
+
+    # THEN: It is logged as failed, and the next ingest can still run
+    latest = IngestRun.run_page_query(per_page=1).items[0]
+    assert latest.status == "failed" and "Bad data file" in latest.error
+    assert run_ingest_once(lambda: ROW_COUNTS).status == "succeeded"
+
+
+def test_scheduler_skips_recent_ingest(app: Flask, ingest_runs) -> None:
+    # GIVEN: An ingest just succeeded
+    run_ingest_once(lambda: ROW_COUNTS)
+
+    # WHEN: The scheduler runs with an interval longer than since then
+    run_scheduler(app, lambda: ingest_runs.append(1) or ROW_COUNTS,
+                  interval=3600, max_runs=1)
+
+    # THEN: It does not ingest again
+    assert not ingest_runs
+
+
+def test_ingest_view(client, ingest_runs) -> None:
+    run_ingest_once(lambda: ROW_COUNTS)
+    response = client.get("/api/ingest?per_page=1")
+    assert response.status_code == 200
+    assert response.json["items"][0]["weather_rows"] == 3
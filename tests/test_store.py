@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Greg Conan: gregmconan@gmail.com
+Created: 2026-10-19
+Updated: 2026-10-19
+"""
+# Import standard libraries
+import math
+
+# PyPI imports
+from flask import Flask
+import pytest
+
+# Local custom imports
+from corteva_challenge.models import weather_model
+from corteva_challenge.store import weather_store
+from corteva_challenge.utilities import build_endpt_path
+
+
+@pytest.fixture()
+def store_client(app: Flask, tmp_path):
+    """ Fixture to enable the WeatherStore with a fresh snapshot
+    """
+    weather_store.snapshot_dir = str(tmp_path)
+    weather_store.check_interval = 0
+    weather_store.build_snapshot()
+    yield app.test_client()
+    weather_store.init_app(app)
+
+
+def assert_same(from_store, from_sql) -> None:
+    """
+    :param from_store: JSON object returned from WeatherStore
+    :param from_sql: JSON object returned from SQL
+    """
+    if isinstance(from_store, float):
+        assert math.isclose(from_store, from_sql, abs_tol=1e-6)
+    elif isinstance(from_store, dict):
+        assert from_store.keys() == from_sql.keys()
+        for key in from_store:
+            assert_same(from_store[key], from_sql[key])
+    elif isinstance(from_store, list):
+        assert len(from_store) == len(from_sql)
+        for each_store, each_sql in zip(from_store, from_sql):
+            assert_same(each_store, each_sql)
+    else:
+        assert from_store == from_sql
+
+
+@pytest.mark.parametrize(("endpoint"), (
+    (build_endpt_path("api", "weather", min_date="1998-01-01", per_page=30,
+                      max_date="1999-01-21", station_id=3, page=2)),
+    (build_endpt_path("api", "weather", station_id=1, per_page=100)),
+    (build_endpt_path("api", "weather", "stats")),
+    (build_endpt_path("api", "weather", "stats", year=1990, station_id=2)),
+))
+def test_store_matches_SQL(store_client, endpoint: str) -> None:
+    # GIVEN: The same request answered from the WeatherStore and from SQL
+    assert weather_store.is_fresh()
+    from_store = store_client.get(endpoint).json
+    weather_store.snapshot = None
+    weather_store.checked_at = math.inf  # Prevent reloading the snapshot
+    from_sql = store_client.get(endpoint).json
+
+    # THEN: Both give the same page of results in the same (station, date)
+    #       order; yearly stats have no defined order, so sort them first
+    if not isinstance(from_store, dict):
+        for stats in (from_store, from_sql):
+            stats.sort(key=lambda x: (x["station_id"], x["year"]))
+    assert_same(from_store, from_sql)
+
+
+def test_missing_snapshot_is_built(app: Flask, tmp_path, monkeypatch) -> None:
+    # GIVEN: No snapshot of the weather data exists on this host
+    weather_store.snapshot_dir = str(tmp_path / "snapshots")
+    weather_store.check_interval = 0
+    client = app.test_client()
+    endpoint = build_endpt_path("api", "weather", station_id=2, per_page=20)
+    try:
+        # WHEN: A request arrives, it reads from SQL and starts a build
+        from_sql = client.get(endpoint).json
+        assert weather_store.snapshot is None
+        weather_store.builder.join(timeout=60)
+
+        # THEN: Later requests are answered from the snapshot, not SQL
+        def fail(*_args, **_kwargs):
+            raise AssertionError("Queried SQL instead of the snapshot")
+        monkeypatch.setattr(weather_model(), "get_page_dict", fail)
+        assert_same(client.get(endpoint).json, from_sql)
+        assert weather_store.snapshot is not None
+    finally:
+        weather_store.init_app(app)
@@ -4,10 +4,23 @@
 """
 Greg Conan: gregmconan@gmail.com
 Created: 2024-07-14
-Updated: 2024-07-14
+Updated: 2026-10-19
 """
+import gzip
+import io
+
+import msgpack
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
-from corteva_challenge.utilities import build_endpt_path
+
+from corteva_challenge import models, views
+from corteva_challenge.formats import ARROW_STREAM, MSGPACK, PARQUET
+from corteva_challenge.models import (CompactWeatherReport, DataVersion, db,
+                                      LocalDataFile, weather_model,
+                                      WeatherNormal, WeatherReport,
+                                      WeatherStation)
+from corteva_challenge.utilities import build_endpt_path, RowCountCache
 
 
 @pytest.mark.parametrize(("endpoint"), (
@@ -24,3 +37,306 @@ def test_views(client, endpoint: str) -> None:
     response = client.get(endpoint)
     assert response.status_code == 200
     print(f"{endpoint}: {response.text}")
+
+
+@pytest.mark.parametrize(("endpoint", "headers", "content_type"), (
+    (build_endpt_path("api", "weather", format="arrow", station_id=3),
+     {}, ARROW_STREAM),
+    (build_endpt_path("api", "weather", min_date="1998-01-01"),
+     {"Accept": PARQUET}, PARQUET),
+    (build_endpt_path("api", "weather", "stats", format="parquet"),
+     {}, PARQUET),
+    (build_endpt_path("api", "weather", "stats", year=1998),
+     {"Accept": ARROW_STREAM}, ARROW_STREAM),
+))
+def test_tabular_formats(client, endpoint: str, headers: dict,
+                         content_type: str) -> None:
+    """
+    :param client
+    """
+    response = client.get(endpoint, headers=headers)
+    assert response.status_code == 200
+    assert response.content_type == content_type
+    if content_type == PARQUET:
+        table = pq.read_table(io.BytesIO(response.data))
+    else:
+        table = pa.ipc.open_stream(response.data).read_all()
+    print(f"{endpoint}: {table.num_rows} rows of {table.schema}")
+
+
+@pytest.mark.parametrize(("endpoint"), (
+    (build_endpt_path("api", "weather", min_date="1998-01-01", per_page=30,
+                      max_date="1999-01-21", station_id=3, page=2)),
+    (build_endpt_path("api", "weather", "stats", year=1990, station_id=2)),
+))
+def test_compact_schema(app, client, endpoint: str) -> None:
+    """
+    :param app
+    :param client
+    """
+    # GIVEN: The same request answered from both weather data DBTables
+    CompactWeatherReport.copy_from_legacy()
+    legacy = client.get(endpoint).json
+    app.config["COMPACT_WEATHER_SCHEMA"] = True
+    compact = client.get(endpoint).json
+
+    # THEN: Both give the same results, except that compact ones have no IDs
+    if isinstance(legacy, dict):
+        for item in legacy["items"]:
+            item.pop("id")
+    for each in (legacy, compact):
+        for stats in (each["items"] if isinstance(each, dict) else each):
+            for key, value in stats.items():
+                if isinstance(value, float):
+                    stats[key] = round(value, 4)
+    assert legacy == compact
+
+
+def test_stale_legacy_schema(app, client) -> None:
+    """
+    :param app
+    :param client
+    """
+    # GIVEN: Newer data in weather_report_compact than in weather_report
+    app.config["WEATHER_STORE_CHECK_SECONDS"] = 0
+    CompactWeatherReport.copy_from_legacy()
+    DataVersion.bump(CompactWeatherReport.__tablename__)
+    db.session.commit()
+    try:
+        # WHEN: Getting weather reports without COMPACT_WEATHER_SCHEMA
+        stale = client.get("/api/weather")
+
+        # THEN: The app refuses to serve them until both DBTables match again
+        assert stale.status_code == 503
+        assert client.get("/api/crop").status_code == 200
+        CompactWeatherReport.copy_from_legacy()
+        assert client.get("/api/weather").status_code == 200
+    finally:
+        WeatherReport.stale_checked_at = -float("inf")
+
+
+def test_weather_batch(client) -> None:
+    """
+    :param client
+    """
+    # GIVEN: Selectors of reports from several stations and date ranges
+    selectors = [
+        {"station_id": 3, "min_date": "1998-01-01", "max_date": "1998-01-21"},
+        {"station_id": 1, "max_date": "1985-01-05"},
+        {"station_id": 2, "min_date": "1999-12-25", "max_date": "1999-12-31"},
+    ]
+
+    # WHEN: All of them are requested at once
+    response = client.post("/api/weather/batch", json=selectors)
+
+    # THEN: Each selector gets the same reports that /api/weather does
+    assert response.status_code == 200
+    results = response.json["results"]
+    assert [result["station_id"] for result in results] == [3, 1, 2]
+    for selector, result in zip(selectors, results):
+        single = client.get(build_endpt_path("api", "weather", per_page=100,
+                                             **selector)).json
+        assert result["total"] == single["total"]
+        assert result["items"] == sorted(single["items"],
+                                         key=lambda x: x["date"])
+
+
+@pytest.mark.parametrize(("body"), (
+    (None), ([]), ({"station_id": 1}), ([{"min_date": "1998-01-01"}]),
+    ([{"station_id": 1, "min_date": "Jan 1"}]), ([{"station_id": True}]),
+    ([{"station_id": 1.9}]), ([{"station_id": "7"}]),
+    ([{"station_id": 1}] * 101),
+))
+def test_weather_batch_rejects(client, body) -> None:
+    """
+    :param client
+    """
+    assert client.post("/api/weather/batch", json=body).status_code == 400
+
+
+def test_weather_summary(client) -> None:
+    """
+    :param client
+    """
+    # GIVEN: Yearly stats from a station, and its summary by station/year
+    stats = client.get(build_endpt_path("api", "weather", "stats",
+                                        station_id=2)).json
+    endpoint = build_endpt_path(
+        "api", "weather", "summary", cols="min_temp,precipitation",
+        stats="avg,sum,p50", group="station,year", station_id=2)
+    summary = client.get(endpoint).json
+
+    # THEN: The summary has the same statistics in 1 row per group
+    assert client.get(endpoint).json == summary  # Memoized
+    assert [x["year"] for x in summary] == sorted(int(x["year"])
+                                                  for x in stats)
+    by_year = {int(x["year"]): x for x in stats}
+    for row in summary:
+        year_stats = by_year[row["year"]]
+        assert row["station_id"] == year_stats["station_id"] == 2
+        assert row["precipitation_sum"] == year_stats["total_precip_cm"]
+        assert round(row["min_temp_avg"], 4) == round(
+            year_stats["avg_min_temp_degC"], 4)
+        assert set(row) == {"station_id", "year", "min_temp_avg",
+                            "min_temp_p50", "min_temp_sum",
+                            "precipitation_avg", "precipitation_p50",
+                            "precipitation_sum"}
+
+
+def test_weather_summary_cache(client, monkeypatch) -> None:
+    """
+    :param client
+    """
+    # GIVEN: A summary cache with room for 3 rows in total
+    cache = RowCountCache(max_rows=3)
+    monkeypatch.setattr(models, "summary_cache", cache)
+
+    # WHEN: The same summary is requested with its lists in 2 orders
+    first = client.get(build_endpt_path(
+        "api", "weather", "summary", cols="min_temp,max_temp",
+        stats="max,min", group="year,station", station_id=2)).json
+    second = client.get(build_endpt_path(
+        "api", "weather", "summary", cols="max_temp,min_temp",
+        stats="min,max", group="station,year", station_id=2)).json
+
+    # THEN: They share 1 result, which is only cached if it fits
+    assert first == second
+    assert len(cache.results) == (1 if len(first) <= 3 else 0)
+
+    # WHEN: Summaries with more rows in total than the cache holds are
+    #       requested
+    for year in range(1985, 1990):
+        client.get(build_endpt_path("api", "weather", "summary",
+                                    min_date=f"{year}-01-01"))
+
+    # THEN: Only the newest fit in the cache
+    assert cache.n_rows == sum(max(len(x), 1) for x in cache.results.values())
+    assert len(cache.results) == 3 and cache.n_rows <= 3
+
+
+def test_weather_summary_too_many_groups(client, monkeypatch) -> None:
+    """
+    :param client
+    """
+    # GIVEN: A limit of 0 groups per summary
+    monkeypatch.setattr(views, "MAX_SUMMARY_ROWS", 0)
+
+    # WHEN: A summary of all reports together (1 group) is requested
+    response = client.get("/api/weather/summary")
+
+    # THEN: It is rejected instead of sending more groups than the limit
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize(("params"), (
+    ({"cols": "id"}), ({"stats": "median"}), ({"stats": "p101"}),
+    ({"group": "day"}),
+))
+def test_weather_summary_rejects(client, params: dict) -> None:
+    """
+    :param client
+    """
+    assert client.get(build_endpt_path("api", "weather", "summary",
+                                       **params)).status_code == 400
+
+
+def test_weather_anomalies(client, tmp_path) -> None:
+    """
+    :param client
+    """
+    # GIVEN: A station whose max temperature on Jan 2 is 10, 20, and 30 C in
+    #        3 different years, so its normal for that day is 20 C
+    station_file = tmp_path / "TESTSTN1.txt"
+    station_file.write_text("".join(
+        f"{year}0102\t{max_temp}\t-100\t0\n" for year, max_temp in
+        ((1990, 100), (1991, 200), (1992, 300))
+    ) + "19900101\t50\t-100\t0\n")
+    model = weather_model()
+    try:
+        WeatherStation.load_reports_from(
+            LocalDataFile(station_file.name, str(station_file)))
+        station_id = WeatherStation.query.filter_by(
+            station_name="TESTSTN1").one().id
+
+        # WHEN: Its anomalies are requested
+        which = dict(station_id=station_id, min_date="1990-01-01",
+                     max_date="1990-01-31")
+        anomalies = client.get(build_endpt_path(
+            "api", "weather", "anomalies", **which)).json
+
+        # THEN: There is 1 per report, and each day's anomaly is its
+        #       difference from that day's mean
+        assert [x["date"] for x in anomalies] == ["1990-01-01", "1990-01-02"]
+        jan_2 = anomalies[1]
+        assert jan_2["max_temp"] == 10
+        assert round(jan_2["max_temp_normal"], 4) == 20
+        assert round(jan_2["max_temp_anomaly"], 4) == -10
+        assert client.get("/api/weather/anomalies").status_code == 400
+        assert client.get(build_endpt_path(
+            "api", "weather", "anomalies", station_id=station_id,
+            format="arrow")).content_type == ARROW_STREAM
+    finally:
+        station = WeatherStation.query.filter_by(
+            station_name="TESTSTN1").one_or_none()
+        if station is not None:
+            for table in (model, WeatherNormal):
+                db.session.execute(db.delete(table).filter_by(
+                    station_id=station.id))
+            db.session.delete(station)
+        db.session.commit()
+
+
+@pytest.mark.parametrize(("encoding", "decompress"), (
+    ("gzip", gzip.decompress),
+    ("zstd", lambda data: pa.input_stream(pa.BufferReader(data),
+                                          compression="zstd").read()),
+))
+def test_compression(client, encoding: str, decompress) -> None:
+    """
+    :param client
+    """
+    # WHEN: A client which accepts encoding requests a large JSON response
+    #       and a streamed Arrow response
+    headers = {"Accept-Encoding": f"{encoding}, identity"}
+    for endpoint in ("/apispec_1.json", build_endpt_path(
+            "api", "weather", format="arrow", station_id=3)):
+        response = client.get(endpoint, headers=headers)
+
+        # THEN: Both are compressed, and decompress into the uncompressed data
+        assert response.headers["Content-Encoding"] == encoding
+        assert "Accept-Encoding" in response.vary
+        assert decompress(response.data) == client.get(endpoint).data
+
+    # THEN: Clients which do not accept encoding get uncompressed data
+    assert "Content-Encoding" not in client.get("/apispec_1.json").headers
+
+
+def test_msgpack_and_columns(client) -> None:
+    """
+    :param client
+    """
+    for endpoint in (build_endpt_path("api", "weather", "stats", year=1998),
+                     build_endpt_path("api", "weather", station_id=3,
+                                      per_page=10),
+                     build_endpt_path("api", "crop", per_page=5)):
+        rows = client.get(endpoint).json
+
+        # WHEN: The same data is requested as MessagePack
+        packed = client.get(endpoint, headers={"Accept": MSGPACK})
+
+        # THEN: It holds the same values as the JSON
+        assert packed.content_type == MSGPACK
+        assert msgpack.unpackb(packed.data) == rows
+
+        # WHEN: The same data is requested in column layout
+        columns = client.get(f"{endpoint}&layout=columns").json
+
+        # THEN: Each column lists its value in each row, in order
+        items = rows if isinstance(rows, list) else rows["items"]
+        if not isinstance(rows, list):
+            assert columns["total"] == rows["total"]
+            columns = columns["items"]
+        assert columns == {key: [row[key] for row in items]
+                           for key in (items[0] if items else ())}
+
+    assert client.get("/api/crop?layout=diagonal").status_code == 400